@@ -8,7 +8,7 @@ import re
 import os
 from typing import Dict, Optional
 
-from utils.llm_providers import call_llm_api, get_preferred_model
+from utils.llm_providers import call_llm_api, forget_llm_response, get_preferred_model
 
 
 class PlanGenerator:
@@ -295,6 +295,7 @@ Focus on creating actionable, well-defined tasks with clear acceptance criteria.
         
         print(f"Generating implementation plan with {self.model}...")
         
+        raw_response = None
         try:
             raw_response = call_llm_api(prompt, model=self.model, max_tokens=self.max_tokens)
             
@@ -316,6 +317,9 @@ Focus on creating actionable, well-defined tasks with clear acceptance criteria.
             return plan
             
         except Exception as e:
+            if raw_response is not None:
+                # Risposta inutilizzabile: fuori dalla cache, il prossimo tentativo interroga il modello
+                forget_llm_response(prompt, self.model, self.max_tokens)
             raise RuntimeError(f"Plan generation failed: {e}")
     
     def estimate_total_effort(self, plan: Dict) -> int:
@@ -9,6 +9,7 @@ from typing import Optional
 
 from utils import (
     call_llm_api, 
+    forget_llm_response,
     get_preferred_model,
     extract_single_diff,
     validate_diff_files,
@@ -43,10 +44,11 @@ Do not include explanations outside the fenced block."""
         """
         print(f"🤖 Calling LLM model: {self.model}")
         
+        full_prompt = f"{self.system_prompt}\n\n{prompt}"
         # Call LLM API with temperature support fallback
         try:
             raw_response = call_llm_api(
-                f"{self.system_prompt}\n\n{prompt}",
+                full_prompt,
                 model=self.model,
                 max_tokens=self.max_tokens,
                 temperature=self.temperature
@@ -54,12 +56,13 @@ Do not include explanations outside the fenced block."""
         except TypeError:
             # Some versions don't accept 'temperature'
             raw_response = call_llm_api(
-                f"{self.system_prompt}\n\n{prompt}",
+                full_prompt,
                 model=self.model,
                 max_tokens=self.max_tokens
             )
         
         if not raw_response or "```" not in raw_response:
+            forget_llm_response(full_prompt, self.model, self.max_tokens)
             raise RuntimeError(
                 "LLM returned empty/invalid content. Expected ONE ```diff ...``` block with unified diff."
             )
@@ -72,9 +75,11 @@ Do not include explanations outside the fenced block."""
         except Exception as e:
             preview = (raw_response or "")[:1200].replace("@", "＠")
             print("⚠️ LLM raw preview (truncated to 1200 chars):\n" + preview)
+            forget_llm_response(full_prompt, self.model, self.max_tokens)  # niente replay dalla cache
             raise
         
         if not diff.strip():
+            forget_llm_response(full_prompt, self.model, self.max_tokens)
             raise RuntimeError(
                 "Empty diff parsed from LLM response. Expected valid unified diff format."
             )
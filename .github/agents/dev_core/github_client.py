@@ -8,6 +8,8 @@ import json
 from typing import Optional, Dict, List, Tuple
 import httpx
 
+from utils.github_api import get_http_client
+
 
 class GitHubClient:
     """Clean wrapper for GitHub REST API operations"""
@@ -39,8 +41,8 @@ class GitHubClient:
         last_exc = None
         for attempt in range(3):
             try:
-                with httpx.Client(timeout=60) as client:
-                    response = client.request(method, url, headers=self._headers(), **kwargs)
+                # Client condiviso con utils.github_api: connessioni keep-alive riusate
+                response = get_http_client().request(method, url, headers=self._headers(), timeout=60, **kwargs)
                 # Retry su 5xx o 429
                 if response.status_code in (429, 500, 502, 503, 504):
                     import time
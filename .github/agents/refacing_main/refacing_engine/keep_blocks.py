@@ -12,6 +12,7 @@ class KEEPBlockValidator:
     
     KEEP_OPEN_PATTERN = re.compile(r"# >>> KEEP:(?P<id>[A-Za-z0-9_\-]+)")
     KEEP_CLOSE_PATTERN = re.compile(r"# <<< KEEP:(?P<id>[A-Za-z0-9_\-]+)")
+    KEEP_MARKER_PATTERN = re.compile(r"# (?P<kind>>>>|<<<) KEEP:(?P<id>[A-Za-z0-9_\-]+)")
     
     @classmethod
     def extract_keep_blocks(cls, content: str) -> Dict[str, str]:
@@ -25,39 +26,45 @@ class KEEPBlockValidator:
             Dictionary mapping block_id to full block content (including markers)
         """
         blocks = {}
-        lines = content.split('\n')
         current_block_id = None
-        current_block_lines = []
+        block_start = 0
+        skip_until = -1  # One marker per line: the rest of a handled line is ignored
         
-        for line in lines:
-            # Check for opening marker
-            open_match = cls.KEEP_OPEN_PATTERN.search(line)
+        # Only marker hits are visited (M markers instead of N lines); blocks are sliced out of content
+        for match in cls.KEEP_MARKER_PATTERN.finditer(content):
+            if match.start() < skip_until:
+                continue
+            line_start = content.rfind('\n', 0, match.start()) + 1
+            line_end = content.find('\n', match.end())
+            if line_end == -1:
+                line_end = len(content)
+            skip_until = line_end
+            
+            # An opening marker anywhere on the line takes precedence over a closing one
+            if match.group('kind') == '>>>':
+                open_match = match
+            else:
+                open_match = cls.KEEP_OPEN_PATTERN.search(content, match.end(), line_end)
             if open_match:
                 if current_block_id is not None:
                     # Nested KEEP blocks are not allowed
                     raise ValueError(f"Nested KEEP block found: {open_match.group('id')} inside {current_block_id}")
                 
                 current_block_id = open_match.group('id')
-                current_block_lines = [line]
+                block_start = line_start
                 continue
             
-            # If we're inside a block, collect lines
+            # Closing markers only matter inside a block
             if current_block_id:
-                current_block_lines.append(line)
+                if match.group('id') != current_block_id:
+                    raise ValueError(
+                        f"Mismatched KEEP block: opened {current_block_id}, "
+                        f"closed {match.group('id')}"
+                    )
                 
-                # Check for closing marker
-                close_match = cls.KEEP_CLOSE_PATTERN.search(line)
-                if close_match:
-                    if close_match.group('id') != current_block_id:
-                        raise ValueError(
-                            f"Mismatched KEEP block: opened {current_block_id}, "
-                            f"closed {close_match.group('id')}"
-                        )
-                    
-                    # Store complete block
-                    blocks[current_block_id] = '\n'.join(current_block_lines)
-                    current_block_id = None
-                    current_block_lines = []
+                # Store complete block
+                blocks[current_block_id] = content[block_start:line_end]
+                current_block_id = None
         
         # Check for unclosed blocks
         if current_block_id is not None:
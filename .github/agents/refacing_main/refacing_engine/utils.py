@@ -2,8 +2,11 @@
 Utility functions for the refacing engine
 """
 import hashlib
+import os
+import re
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict
 
@@ -53,17 +56,23 @@ def estimate_tokens(text: str) -> int:
 
 
 def get_repo_root() -> Path:
-    """Get git repository root directory"""
+    """Get git repository root directory (cached per working directory)"""
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"], 
-            capture_output=True, text=True, check=True
-        )
-        return Path(result.stdout.strip())
+        return _repo_root_for(os.getcwd())
     except subprocess.CalledProcessError:
         raise RuntimeError("Not in a git repository or git not available")
 
 
+@lru_cache(maxsize=8)
+def _repo_root_for(cwd: str) -> Path:
+    # Failures raise and are therefore not cached
+    result = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], 
+        capture_output=True, text=True, check=True, cwd=cwd
+    )
+    return Path(result.stdout.strip())
+
+
 def is_path_under_repo(file_path: Path, repo_root: Path = None) -> bool:
     """Check if file path is under repository root"""
     if repo_root is None:
@@ -89,15 +98,15 @@ def freeze_keep_blocks(content: str, blocks: Dict[str, str]) -> tuple[str, Dict[
     if not blocks:
         return content, {}
     
-    frozen = content
-    mapping = {}
-    
-    for i, (block_id, block_content) in enumerate(blocks.items(), 1):
-        token = f"__KEEP_BLOCK_{i}_{block_id}__"
-        frozen = frozen.replace(block_content, token)
-        mapping[token] = block_content
+    mapping = {
+        f"__KEEP_BLOCK_{i}_{block_id}__": block_content
+        for i, (block_id, block_content) in enumerate(blocks.items(), 1)
+    }
+    tokens = {block_content: token for token, block_content in mapping.items()}
     
-    return frozen, mapping
+    # One pass over the content for all blocks (no full-size copy per block)
+    pattern = re.compile("|".join(map(re.escape, tokens)))
+    return pattern.sub(lambda m: tokens[m.group(0)], content), mapping
 
 
 def thaw_keep_blocks(content: str, mapping: Dict[str, str]) -> str:
@@ -105,11 +114,8 @@ def thaw_keep_blocks(content: str, mapping: Dict[str, str]) -> str:
     if not mapping:
         return content
     
-    thawed = content
-    for token, block_content in mapping.items():
-        thawed = thawed.replace(token, block_content)
-    
-    return thawed
+    pattern = re.compile("|".join(map(re.escape, mapping)))
+    return pattern.sub(lambda m: mapping[m.group(0)], content)
 
 
 def safe_git_operation(operation: callable, *args, **kwargs) -> bool:
@@ -10,77 +10,35 @@ import re
 import time
 from typing import Dict, List, Optional
 
-from utils.llm_providers import call_llm_api, get_preferred_model
+from utils.llm_providers import call_llm_api, forget_llm_response, get_preferred_model
 
 
-class LLMReviewer:
-    """Handles LLM-based code review with robust parsing and retry logic"""
-    
-    def __init__(self, model: Optional[str] = None, max_tokens: int = 4000, max_retries: int = 2):
-        self.model = model or get_preferred_model("reviewer")
-        self.max_tokens = max_tokens
-        self.max_retries = max_retries
-    
-    def create_review_prompt(self, pr_data: Dict, files_data: List[Dict], project_root: str) -> str:
-        """Create standardized prompt for LLM review"""
-        title = pr_data.get("title", "")
-        body = pr_data.get("body", "")
-        
-        # Collect diff content with size limit
-        diff_sections = []
-        total_size = 0
-        max_diff_size = 50000  # 50KB limit for diff content
-        
-        for file_data in files_data:
-            filename = file_data.get("filename", "")
-            patch = file_data.get("patch", "")
-            
-            if patch:
-                section = f"=== {filename} ===\n{patch}"
-                if total_size + len(section) > max_diff_size:
-                    diff_sections.append(f"... (remaining files truncated due to size limit)")
-                    break
-                diff_sections.append(section)
-                total_size += len(section)
-        
-        diff_content = "\n\n".join(diff_sections) if diff_sections else "No changes detected"
-        
-        prompt = f"""# AI Code Reviewer Task
+# Parte statica del prompt (istruzioni + schema): sempre identica, va in testa
+# come system prefix così i provider possono riusarla dalla prompt cache
+REVIEW_SYSTEM_PROMPT = """# AI Code Reviewer Task
 
 You are reviewing a Pull Request. Analyze the code changes and provide feedback in JSON format.
 
-## PR Details
-Title: {title}
-Description: {body}
-
-## Path Scope (VERY IMPORTANT)
-- Project root: `{project_root}`
-- All analysis and any suggested changes MUST remain strictly under this root.
-- Do NOT suggest moving/renaming files outside this root.
-
-## Code Changes
-{diff_content}
-
 ## Instructions
 Analyze the changes and respond with ONLY a JSON object containing:
 
 ```json
-{{
+{
   "blockers": <int>,
   "importants": <int>,
   "suggestions": <int>,
   "findings": [
-    {{
+    {
       "level": "BLOCKER|IMPORTANT|SUGGESTION",
       "file": "path/relative/to/project_root",
       "line": <int or null>,
       "problem": "Cosa non va (chiaro e verificabile)",
       "why_it_matters": "Perché impatta qualità/bug/perf/sicurezza",
       "proposal": "Come risolvere o aggirare (senza codice o con pseudocodice)"
-    }}
+    }
   ],
   "prioritized_actions": [
-    {{
+    {
       "id": "R-001",
       "title": "Titolo breve dell'intervento",
       "severity": "BLOCKER|IMPORTANT|SUGGESTION",
@@ -88,10 +46,10 @@ Analyze the changes and respond with ONLY a JSON object containing:
       "rationale": "Sintesi del perché va fatto",
       "dependencies": ["R-000?"],
       "files_touched": ["path/...", "path/..."]
-    }}
+    }
   ],
   "summary": "Sintesi finale (breve)"
-}}
+}
 ```
 
 ## Evaluation Criteria
@@ -112,58 +70,109 @@ Focus on:
 - Dependencies: Reference other action IDs if one must be done before another
 - Files_touched: List the specific files that would be modified by this action
 - Keep rationale concise but compelling
+"""
+
+
+class LLMReviewer:
+    """Handles LLM-based code review with robust parsing and retry logic"""
+    
+    def __init__(self, model: Optional[str] = None, max_tokens: int = 4000, max_retries: int = 2):
+        self.model = model or get_preferred_model("reviewer")
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+    
+    def create_review_prompt(self, pr_data: Dict, files_data: List[Dict], project_root: str) -> str:
+        """Create the per-PR part of the review prompt (instructions live in REVIEW_SYSTEM_PROMPT)"""
+        title = pr_data.get("title", "")
+        body = pr_data.get("body", "")
+        
+        # Collect diff content with size limit
+        diff_sections = []
+        total_size = 0
+        max_diff_size = 50000  # 50KB limit for diff content
+        
+        for file_data in files_data:
+            filename = file_data.get("filename", "")
+            patch = file_data.get("patch", "")
+            
+            if patch:
+                section = f"=== {filename} ===\n{patch}"
+                if total_size + len(section) > max_diff_size:
+                    diff_sections.append(f"... (remaining files truncated due to size limit)")
+                    break
+                diff_sections.append(section)
+                total_size += len(section)
+        
+        diff_content = "\n\n".join(diff_sections) if diff_sections else "No changes detected"
+        
+        prompt = f"""## PR Details
+Title: {title}
+Description: {body}
 
+## Path Scope (VERY IMPORTANT)
+- Project root: `{project_root}`
+- All analysis and any suggested changes MUST remain strictly under this root.
+- Do NOT suggest moving/renaming files outside this root.
+
+## Code Changes
+{diff_content}
 """
         return prompt
     
-    def parse_llm_response(self, raw_response: str) -> Dict:
+    def parse_json_response(self, raw_response: str) -> Dict:
         """
-        Robust parsing of LLM response with fallback handling.
+        Strict parsing of the LLM JSON response (raises if it is not valid JSON).
         Accepts JSON "naked" or inside ```json ... ``` fences.
         NOTE: patches are not supported (read-only reviewer).
         """
+        # Try to extract JSON from fenced block first
+        json_match = re.search(r'```json\s*(.*?)\s*```', raw_response, re.DOTALL | re.IGNORECASE)
+        json_str = json_match.group(1) if json_match else raw_response.strip()
+        
+        data = json.loads(json_str)
+        
+        # Normalize response structure (no patches)
+        result = {
+            "blockers": int(data.get("blockers", 0) or 0),
+            "importants": int(data.get("importants", 0) or 0),
+            "suggestions": int(data.get("suggestions", 0) or 0),
+            "findings": data.get("findings", []) or [],
+            "summary": str(data.get("summary", "No summary provided") or "No summary provided"),
+            "prioritized_actions": data.get("prioritized_actions", []) or []
+        }
+        
+        # Validate prioritized_actions structure
+        validated_actions = []
+        for action in result["prioritized_actions"]:
+            if isinstance(action, dict):
+                validated_action = {
+                    "id": str(action.get("id", "")),
+                    "title": str(action.get("title", "")),
+                    "severity": str(action.get("severity", "SUGGESTION")).upper(),
+                    "effort": str(action.get("effort", "M")).upper(),
+                    "rationale": str(action.get("rationale", "")),
+                    "dependencies": action.get("dependencies", []) if isinstance(action.get("dependencies"), list) else [],
+                    "files_touched": action.get("files_touched", []) if isinstance(action.get("files_touched"), list) else []
+                }
+                # Validate severity
+                if validated_action["severity"] not in ["BLOCKER", "IMPORTANT", "SUGGESTION"]:
+                    validated_action["severity"] = "SUGGESTION"
+                # Validate effort
+                if validated_action["effort"] not in ["S", "M", "L"]:
+                    validated_action["effort"] = "M"
+                validated_actions.append(validated_action)
+        
+        result["prioritized_actions"] = validated_actions
+        
+        return result
+    
+    def parse_llm_response(self, raw_response: str) -> Dict:
+        """
+        Robust parsing of LLM response with fallback handling (see parse_json_response).
+        """
         
         try:
-            # Try to extract JSON from fenced block first
-            json_match = re.search(r'```json\s*(.*?)\s*```', raw_response, re.DOTALL | re.IGNORECASE)
-            json_str = json_match.group(1) if json_match else raw_response.strip()
-            
-            data = json.loads(json_str)
-            
-            # Normalize response structure (no patches)
-            result = {
-                "blockers": int(data.get("blockers", 0) or 0),
-                "importants": int(data.get("importants", 0) or 0),
-                "suggestions": int(data.get("suggestions", 0) or 0),
-                "findings": data.get("findings", []) or [],
-                "summary": str(data.get("summary", "No summary provided") or "No summary provided"),
-                "prioritized_actions": data.get("prioritized_actions", []) or []
-            }
-            
-            # Validate prioritized_actions structure
-            validated_actions = []
-            for action in result["prioritized_actions"]:
-                if isinstance(action, dict):
-                    validated_action = {
-                        "id": str(action.get("id", "")),
-                        "title": str(action.get("title", "")),
-                        "severity": str(action.get("severity", "SUGGESTION")).upper(),
-                        "effort": str(action.get("effort", "M")).upper(),
-                        "rationale": str(action.get("rationale", "")),
-                        "dependencies": action.get("dependencies", []) if isinstance(action.get("dependencies"), list) else [],
-                        "files_touched": action.get("files_touched", []) if isinstance(action.get("files_touched"), list) else []
-                    }
-                    # Validate severity
-                    if validated_action["severity"] not in ["BLOCKER", "IMPORTANT", "SUGGESTION"]:
-                        validated_action["severity"] = "SUGGESTION"
-                    # Validate effort
-                    if validated_action["effort"] not in ["S", "M", "L"]:
-                        validated_action["effort"] = "M"
-                    validated_actions.append(validated_action)
-            
-            result["prioritized_actions"] = validated_actions
-            
-            return result
+            return self.parse_json_response(raw_response)
             
         except Exception as e:
             print(f"JSON parsing failed: {e}")
@@ -201,13 +210,23 @@ Focus on:
         # Retry logic for LLM calls
         for attempt in range(self.max_retries + 1):
             try:
+                # Dopo un fallimento si salta la cache: lo stesso prompt ridarebbe la stessa risposta
                 raw_response = call_llm_api(
                     prompt, 
                     model=self.model, 
-                    max_tokens=self.max_tokens
+                    max_tokens=self.max_tokens,
+                    system_prefix=REVIEW_SYSTEM_PROMPT,
+                    refresh=attempt > 0
                 )
                 
-                result = self.parse_llm_response(raw_response)
+                try:
+                    result = self.parse_json_response(raw_response)
+                except Exception:
+                    # Risposta inutilizzabile: non deve restare in cache per i prossimi run
+                    forget_llm_response(prompt, self.model, self.max_tokens, REVIEW_SYSTEM_PROMPT)
+                    if attempt < self.max_retries:
+                        raise
+                    result = self.parse_llm_response(raw_response)  # ultimo tentativo: fallback euristico
                 
                 print(f"LLM review completed: {result['blockers']} blockers, "
                       f"{result['importants']} important, {result['suggestions']} suggestions, "
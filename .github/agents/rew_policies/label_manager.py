@@ -69,7 +69,7 @@ class LabelManager:
     
     def ensure_policy_labels_exist(self) -> None:
         """Create standard policy labels if they don't exist"""
-        from utils.github_api import ensure_label_exists
+        from utils.github_api import aensure_label_exists, run_concurrently
         
         policy_labels = [
             ("policy:strict", "D73A49", "Strict review policy - fail on IMPORTANT+ issues"),
@@ -78,8 +78,11 @@ class LabelManager:
             ("ready-to-merge", "28A745", "PR passed review and is ready to merge")
         ]
         
-        for name, color, description in policy_labels:
-            try:
-                ensure_label_exists(self.owner, self.repo, name, color, description)
-            except Exception as e:
-                print(f"Failed to create label '{name}': {e}")
+        # Label indipendenti: creazione in parallelo invece di N round-trip seriali
+        results = run_concurrently(*(
+            aensure_label_exists(self.owner, self.repo, name, color, description)
+            for name, color, description in policy_labels
+        ))
+        for (name, _, _), result in zip(policy_labels, results, strict=True):
+            if isinstance(result, Exception):
+                print(f"Failed to create label '{name}': {result}")
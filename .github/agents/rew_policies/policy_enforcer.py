@@ -9,6 +9,14 @@ from typing import Dict, Optional
 
 from utils.github_api import graphql_request, get_issue_node_id, add_item_to_project, set_project_single_select, get_repo_info
 
+# Policy log lines, formatted once per decision (unknown policies use the fallback)
+_POLICY_FMT = {
+    "lenient": "Policy: lenient - always pass (exit {code})",
+    "essential-only": "Policy: essential-only - exit {code} (blockers={b})",
+    "strict": "Policy: strict - exit {code} (blockers={b}, importants={i})",
+}
+_POLICY_FMT_UNKNOWN = "Policy: unknown '{name}' - defaulting to essential-only, exit {code}"
+
 
 class PolicyEnforcer:
     """Handles policy enforcement and project status updates"""
@@ -55,15 +63,7 @@ class PolicyEnforcer:
         Returns:
             0 for success, 1 for failure
         """
-        if policy_name == "lenient":
-            return 0  # Always pass
-        elif policy_name == "essential-only":
-            return 1 if blockers > 0 else 0
-        elif policy_name == "strict":
-            return 1 if (blockers > 0 or importants > 0) else 0
-        else:
-            # Unknown policy, default to essential-only
-            return 1 if blockers > 0 else 0
+        return 1 if self.determine_must_fix(policy_name, blockers, importants) else 0
     
     def extract_source_issue_from_pr_body(self, pr_body: str) -> Optional[int]:
         """
@@ -121,7 +121,8 @@ class PolicyEnforcer:
                                         policy_name: str, 
                                         blockers: int, 
                                         importants: int,
-                                        suggestions: int) -> int:
+                                        suggestions: int,
+                                        verbose: bool = True) -> int:
         """
         Log policy enforcement decision and return appropriate exit code.
         
@@ -130,19 +131,15 @@ class PolicyEnforcer:
             blockers: Blocker count
             importants: Important issues count  
             suggestions: Suggestions count
+            verbose: Print the policy decision line
             
         Returns:
             Exit code for the process
         """
         exit_code = self.calculate_exit_code(policy_name, blockers, importants)
         
-        if policy_name == "lenient":
-            print(f"Policy: lenient - always pass (exit 0)")
-        elif policy_name == "essential-only":
-            print(f"Policy: essential-only - exit {exit_code} (blockers={blockers})")
-        elif policy_name == "strict":
-            print(f"Policy: strict - exit {exit_code} (blockers={blockers}, importants={importants})")
-        else:
-            print(f"Policy: unknown '{policy_name}' - defaulting to essential-only, exit {exit_code}")
+        if verbose:
+            fmt = _POLICY_FMT.get(policy_name, _POLICY_FMT_UNKNOWN)
+            print(fmt.format(code=exit_code, b=blockers, i=importants, name=policy_name))
         
         return exit_code
@@ -1,6 +1,6 @@
 
 # SPDX-License-Identifier: MIT
-from .thread_ledger import ThreadLedger
+from .thread_ledger import ThreadLedger, SQLiteThreadLedger
 from .snapshot_store import SnapshotStore
 from .prompt_builder import PromptBuilder, PromptProfile
 from .diff_record import DiffRecorder, preflight_git_apply_check
@@ -17,7 +17,7 @@ from .snapshot_utils import (
 preflight_git_apply_threeway = DiffRecorder.preflight_git_apply_threeway
 
 __all__ = [
-    "ThreadLedger", "SnapshotStore", "PromptBuilder", "PromptProfile",
+    "ThreadLedger", "SQLiteThreadLedger", "SnapshotStore", "PromptBuilder", "PromptProfile",
     "DiffRecorder", "preflight_git_apply_check", "preflight_git_apply_threeway",
     "normalize_paths_under_root", "split_existing_missing", "safe_snapshot_existing_files",
     "update_snapshots_after_commit", "detect_changed_files", "post_commit_snapshot_update",
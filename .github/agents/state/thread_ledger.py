@@ -1,33 +1,146 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
-import json, os, time
+import json, os, sqlite3, threading, time
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 LEDGER_ROOT = Path(os.getenv("LEDGER_ROOT", "logs/threads"))
 LEDGER_ROOT.mkdir(parents=True, exist_ok=True)
+# "json" (default: un file per thread) oppure "sqlite" (unico DB in WAL mode)
+LEDGER_BACKEND = os.getenv("LEDGER_BACKEND", "json").lower()
+LEDGER_DB = Path(os.getenv("LEDGER_DB", str(LEDGER_ROOT / "ledger.sqlite3")))
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import orjson
+except ImportError:  # fallback stdlib
+    orjson = None
+
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+def _dumps(data: Dict[str, Any], pretty: bool = True) -> bytes:
+    if orjson is not None:
+        opts = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=opts)
+    return json.dumps(data, indent=2 if pretty else None, ensure_ascii=False).encode("utf-8")
+
+def _loads(raw: bytes | str) -> Dict[str, Any]:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
 
 @contextmanager
 def _lock(path: Path, timeout: float = 10.0):
-    """File lock minimale cross-process."""
-    lock = path.with_suffix(".lock")
-    start = time.time()
-    while True:
+    """
+    Lock advisory cross-process (flock; msvcrt su Windows) su un sidecar "<file>.lock".
+    Il file dati viene sostituito con os.replace ad ogni scrittura, quindi il lock
+    non può stare sul suo inode: il sidecar è stabile e non viene mai rimosso.
+    """
+    fd = os.open(path.with_name(path.name + ".lock"), os.O_RDWR | os.O_CREAT | _O_BINARY, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Lock timeout: {path}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
         try:
-            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-            os.write(fd, str(os.getpid()).encode())
+            yield fd
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def _read_bytes(path: Path) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+def _atomic_write(path: Path, payload: bytes, durable: bool = False) -> None:
+    """
+    Scrive su un temp nella stessa directory e fa os.replace: i lettori vedono sempre
+    un documento completo. Con durable=True fsync del file (e della directory su POSIX).
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            if durable:
+                os.fsync(fd)
+        finally:
             os.close(fd)
-            break
-        except FileExistsError:
-            if time.time() - start > timeout:
-                raise TimeoutError(f"Lock timeout: {lock}")
-            time.sleep(0.05)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if durable and fcntl is not None:
+        dfd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+
+# Cache in-process dei byte del documento, validata con (inode, mtime_ns, size):
+# ogni replace atomico cambia inode, quindi una read() su file invariato evita lock + I/O.
+# Si tengono i byte e non il dict: riparsare (orjson) costa meno di un deepcopy e il
+# chiamante riceve comunque un dict suo, mutabile.
+_doc_cache: Dict[Path, tuple] = {}
+_doc_cache_mutex = threading.Lock()
+
+def _stat_sig(path: Path) -> Optional[tuple]:
     try:
-        yield
-    finally:
-        try: os.remove(lock)
-        except FileNotFoundError: pass
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _cache_put(path: Path, raw: bytes) -> None:
+    """Da chiamare col lock del path tenuto (il file non può cambiare tra write e stat)."""
+    sig = _stat_sig(path)
+    with _doc_cache_mutex:
+        if sig is None:
+            _doc_cache.pop(path, None)
+        else:
+            _doc_cache[path] = (sig, raw)
+
+def _cache_get(path: Path) -> Optional[bytes]:
+    sig = _stat_sig(path)
+    if sig is None:
+        return None
+    with _doc_cache_mutex:
+        hit = _doc_cache.get(path)
+    return hit[1] if hit is not None and hit[0] == sig else None
 
 _DEFAULT_DOC: Dict[str, Any] = {
     "thread_id": None,
@@ -53,40 +166,74 @@ _DEFAULT_DOC: Dict[str, Any] = {
     "policy": {"allow_comment_patches": False, "acl": {"apply_patch": []}},
     "telemetry": {"tokens": {"prompt": 0, "completion": 0}, "latency_ms": 0, "cost_estimate": 0.0}
 }
+# Copia profonda "congelata": ogni nuovo documento la riparsa, senza alias sulle strutture annidate
+_DEFAULT_DOC_BYTES = _dumps(_DEFAULT_DOC, pretty=False)
+
+# Flat combining per append_decision: i thread in attesa accodano la decisione, chi ottiene
+# il lock del path le scrive tutte con un solo RMW + fsync (per-process; tra processi vale il flock)
+_pending_decisions: Dict[Path, list] = {}
+_pending_mutex = threading.Lock()
+_combiner_locks: Dict[Path, threading.Lock] = {}
 
 class ThreadLedger:
     """
     Ledger di stato per un thread (PR/Issue/Task).
-    Persistenza JSON + lock file. Facile migrazione a SQLite se in futuro serve.
+    Persistenza JSON (replace atomico) + flock su sidecar .lock; con LEDGER_BACKEND=sqlite si ottiene SQLiteThreadLedger.
     """
+    def __new__(cls, thread_id: str):
+        if cls is ThreadLedger and LEDGER_BACKEND == "sqlite":
+            cls = SQLiteThreadLedger
+        return super().__new__(cls)
+
     def __init__(self, thread_id: str):
         self.thread_id = thread_id
         self.path = LEDGER_ROOT / f"{thread_id}.json"
 
+    def _new_doc(self) -> Dict[str, Any]:
+        doc = _loads(_DEFAULT_DOC_BYTES)
+        doc["thread_id"] = self.thread_id
+        return doc
+
     def _ensure(self) -> None:
         if not self.path.exists():
-            doc = dict(_DEFAULT_DOC)
-            doc["thread_id"] = self.thread_id
-            self.write(doc)
+            self._locked_rmw(lambda data: None)
+
+    def _locked_rmw(self, mutate: Callable[[Dict[str, Any]], None], durable: bool = False) -> None:
+        """Read-modify-write sotto un solo lock: un parse e un dump per mutazione, niente TOCTOU."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock(self.path):
+            raw = _read_bytes(self.path)
+            data = _loads(raw) if raw else self._new_doc()
+            mutate(data)
+            payload = _dumps(data)
+            _atomic_write(self.path, payload, durable)
+            _cache_put(self.path, payload)
 
     def read(self) -> Dict[str, Any]:
+        cached = _cache_get(self.path)
+        if cached is not None:
+            return _loads(cached)
         self._ensure()
         with _lock(self.path):
-            return json.loads(self.path.read_text(encoding="utf-8"))
+            raw = _read_bytes(self.path)
+            _cache_put(self.path, raw)
+        return _loads(raw)
 
-    def write(self, data: Dict[str, Any]) -> None:
+    def write(self, data: Dict[str, Any], durable: bool = False) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = _dumps(data)
         with _lock(self.path):
-            self.path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            _atomic_write(self.path, payload, durable)
+            _cache_put(self.path, payload)
 
     def update(self, **patch) -> None:
-        data = self.read()
-        for k, v in patch.items():
-            if isinstance(v, dict) and isinstance(data.get(k), dict):
-                data[k].update(v)
-            else:
-                data[k] = v
-        self.write(data)
+        def apply(data: Dict[str, Any]) -> None:
+            for k, v in patch.items():
+                if isinstance(v, dict) and isinstance(data.get(k), dict):
+                    data[k].update(v)
+                else:
+                    data[k] = v
+        self._locked_rmw(apply)
 
     def set_scope(self, must_edit: list[str], must_not_edit: Optional[list[str]] = None) -> None:
         self.update(scope={"must_edit": must_edit, "must_not_edit": must_not_edit or []})
@@ -104,10 +251,133 @@ class ThreadLedger:
         self.update(status=new_status)
 
     def append_decision(self, note: str, actor: str) -> None:
-        data = self.read()
-        data["decisions"].append({
+        entry = {
             "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
             "actor": actor,
             "note": note
-        })
-        self.write(data)
+        }
+        slot = {"entry": entry, "done": False, "error": None}
+        with _pending_mutex:
+            _pending_decisions.setdefault(self.path, []).append(slot)
+            combiner = _combiner_locks.setdefault(self.path, threading.Lock())
+        with combiner:
+            if not slot["done"]:
+                # Siamo il combiner: drena tutto ciò che si è accumulato nel frattempo
+                with _pending_mutex:
+                    batch = _pending_decisions.pop(self.path, [])
+                try:
+                    # Le decisioni sono la traccia di audit: unica mutazione con fsync
+                    self._locked_rmw(
+                        lambda data: data["decisions"].extend(b["entry"] for b in batch), durable=True)
+                except BaseException as e:
+                    for b in batch:
+                        b["error"] = e
+                finally:
+                    for b in batch:
+                        b["done"] = True
+        if slot["error"] is not None:
+            raise slot["error"]
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (thread_id TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id TEXT NOT NULL, ts TEXT NOT NULL, actor TEXT NOT NULL, note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_by_thread ON decisions (thread_id, id);
+"""
+_sqlite_conn: Optional[sqlite3.Connection] = None
+_sqlite_pid: Optional[int] = None  # connessioni SQLite non vanno condivise dopo fork()
+_sqlite_mutex = threading.RLock()
+
+@contextmanager
+def _sqlite_tx(write: bool = True, durable: bool = False):
+    """
+    Transazione sulla connessione di processo (BEGIN IMMEDIATE per le scritture).
+    durable=True committa con synchronous=FULL (fsync del WAL), come _atomic_write per il JSON.
+    """
+    global _sqlite_conn, _sqlite_pid
+    with _sqlite_mutex:
+        if _sqlite_conn is None or _sqlite_pid != os.getpid():
+            LEDGER_DB.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(LEDGER_DB), timeout=10.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SQLITE_SCHEMA)
+            _sqlite_conn, _sqlite_pid = conn, os.getpid()
+        conn = _sqlite_conn
+        if durable:
+            conn.execute("PRAGMA synchronous=FULL")  # non modificabile dentro una transazione
+        try:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # Anche un COMMIT fallito lascia la transazione aperta sulla connessione condivisa
+                if conn.in_transaction:
+                    try:
+                        conn.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        conn.close()  # connessione inservibile: la prossima transazione ne apre un'altra
+                        _sqlite_conn = None
+                raise
+        finally:
+            if durable and _sqlite_conn is conn:
+                conn.execute("PRAGMA synchronous=NORMAL")
+
+class SQLiteThreadLedger(ThreadLedger):
+    """
+    Ledger su SQLite (WAL): una riga JSON per thread + tabella append-only delle decisioni.
+    append_decision è un singolo INSERT, senza riscrivere il documento.
+    """
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.path = LEDGER_DB
+
+    def _ensure(self) -> None:
+        pass  # il documento di default viene creato alla prima scrittura
+
+    def _load(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        row = conn.execute("SELECT doc FROM threads WHERE thread_id = ?", (self.thread_id,)).fetchone()
+        data = _loads(row[0]) if row else self._new_doc()
+        data["decisions"] = [
+            {"ts": ts, "actor": actor, "note": note}
+            for ts, actor, note in conn.execute(
+                "SELECT ts, actor, note FROM decisions WHERE thread_id = ? ORDER BY id", (self.thread_id,))
+        ]
+        return data
+
+    def _store(self, conn: sqlite3.Connection, data: Dict[str, Any], decisions_changed: bool = True) -> None:
+        doc = {k: v for k, v in data.items() if k != "decisions"}
+        conn.execute("INSERT OR REPLACE INTO threads (thread_id, doc) VALUES (?, ?)",
+                     (self.thread_id, _dumps(doc, pretty=False).decode("utf-8")))
+        if decisions_changed:
+            conn.execute("DELETE FROM decisions WHERE thread_id = ?", (self.thread_id,))
+            conn.executemany(
+                "INSERT INTO decisions (thread_id, ts, actor, note) VALUES (?, ?, ?, ?)",
+                [(self.thread_id, d.get("ts", ""), d.get("actor", ""), d.get("note", ""))
+                 for d in data.get("decisions") or []])
+
+    def _locked_rmw(self, mutate: Callable[[Dict[str, Any]], None], durable: bool = False) -> None:
+        with _sqlite_tx(durable=durable) as conn:
+            data = self._load(conn)
+            before = list(data["decisions"])
+            mutate(data)
+            self._store(conn, data, decisions_changed=data.get("decisions") != before)
+
+    def read(self) -> Dict[str, Any]:
+        with _sqlite_tx(write=False) as conn:
+            return self._load(conn)
+
+    def write(self, data: Dict[str, Any], durable: bool = False) -> None:
+        with _sqlite_tx(durable=durable) as conn:
+            self._store(conn, data)
+
+    def append_decision(self, note: str, actor: str) -> None:
+        with _sqlite_tx(durable=True) as conn:  # decisioni: stessa garanzia dell'fsync del backend JSON
+            conn.execute("INSERT OR IGNORE INTO threads (thread_id, doc) VALUES (?, ?)",
+                         (self.thread_id, _dumps(self._new_doc(), pretty=False).decode("utf-8")))
+            conn.execute("INSERT INTO decisions (thread_id, ts, actor, note) VALUES (?, ?, ?, ?)",
+                         (self.thread_id, time.strftime("%Y-%m-%dT%H:%M:%S"), actor, note))
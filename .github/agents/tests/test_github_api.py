@@ -0,0 +1,101 @@
+"""
+Tests for utils.github_api retry policy and caching (httpx MockTransport, no network)
+"""
+import os
+
+import httpx
+import pytest
+
+from utils import github_api
+
+
+@pytest.fixture
+def mock_github(monkeypatch):
+    """Route the pooled client through a handler; returns the list of seen requests"""
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    monkeypatch.setattr(github_api.time, "sleep", lambda s: None)
+    github_api.clear_github_cache()
+    seen = []
+
+    def install(handler):
+        def record(request):
+            seen.append(request)
+            return handler(request)
+        client = httpx.Client(base_url=github_api.API_BASE_URL, transport=httpx.MockTransport(record))
+        monkeypatch.setattr(github_api, "_client", client)
+        monkeypatch.setattr(github_api, "_client_pid", os.getpid())
+        return seen
+
+    yield install
+    github_api.clear_github_cache()
+
+
+class TestRetryPolicy:
+    """Writes are retried only when they cannot have reached the server"""
+
+    def test_post_5xx_is_not_retried(self, mock_github):
+        seen = mock_github(lambda request: httpx.Response(502))
+        with pytest.raises(RuntimeError, match="502"):
+            github_api.rest_request("POST", "/repos/o/r/issues/1/comments", json={"body": "hi"})
+        assert len(seen) == 1
+
+    def test_get_5xx_is_retried(self, mock_github):
+        seen = mock_github(lambda request: httpx.Response(502))
+        with pytest.raises(RuntimeError, match="502"):
+            github_api.rest_request("GET", "/repos/o/r")
+        assert len(seen) == github_api.GITHUB_MAX_RETRIES + 1
+
+    def test_post_connect_error_is_retried(self, mock_github):
+        def handler(request):
+            if len(seen) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(201, json={"id": 1})
+        seen = mock_github(handler)
+        assert github_api.rest_request("POST", "/repos/o/r/issues", json={"title": "t"}) == {"id": 1}
+        assert len(seen) == 2
+
+    def test_post_rate_limit_is_retried(self, mock_github):
+        def handler(request):
+            if len(seen) == 1:
+                return httpx.Response(429, headers={"retry-after": "1"})
+            return httpx.Response(201, json={"id": 1})
+        seen = mock_github(handler)
+        assert github_api.rest_request("POST", "/repos/o/r/issues", json={"title": "t"}) == {"id": 1}
+        assert len(seen) == 2
+
+    def test_mutation_read_timeout_is_not_retried(self, mock_github):
+        def handler(request):
+            raise httpx.ReadTimeout("slow", request=request)
+        seen = mock_github(handler)
+        with pytest.raises(httpx.ReadTimeout):
+            github_api.graphql_request(github_api._M_ADD_PROJECT_ITEM, {"projectId": "p", "contentId": "c"})
+        assert len(seen) == 1
+
+    def test_query_read_timeout_is_retried(self, mock_github):
+        def handler(request):
+            raise httpx.ReadTimeout("slow", request=request)
+        seen = mock_github(handler)
+        with pytest.raises(httpx.ReadTimeout):
+            github_api.graphql_request(github_api._Q_ISSUE_NODE_ID, {"owner": "o", "repo": "r", "number": 1})
+        assert len(seen) == github_api.GITHUB_MAX_RETRIES + 1
+
+
+class TestLabelReads:
+    """PR labels are revalidated on every read"""
+
+    def test_get_pr_labels_sees_changes(self, mock_github):
+        labels = ["bug"]
+
+        def handler(request):
+            etag = f'"{len(labels)}"'
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304)
+            return httpx.Response(200, json=[{"name": n} for n in labels], headers={"etag": etag})
+
+        seen = mock_github(handler)
+        assert [l["name"] for l in github_api.get_pr_labels("o", "r", 1)] == ["bug"]
+        assert [l["name"] for l in github_api.get_pr_labels("o", "r", 1)] == ["bug"]
+        assert seen[-1].headers.get("if-none-match") == '"1"'  # conditional GET, served from ETag cache
+
+        labels.append("needs-review")  # changed out of band
+        assert [l["name"] for l in github_api.get_pr_labels("o", "r", 1)] == ["bug", "needs-review"]
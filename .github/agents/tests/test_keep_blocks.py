@@ -0,0 +1,43 @@
+"""
+Tests for KEEP block extraction in utils.reface_engine
+"""
+from utils.reface_engine import KEEPBlockValidator
+
+
+class TestExtractKeepBlocks:
+    """KEEP block scanning follows the line-by-line rules"""
+
+    def test_no_markers(self):
+        assert KEEPBlockValidator.extract_keep_blocks("x = 1\n") == {}
+
+    def test_simple_block(self):
+        content = "a\n# >>> KEEP:one\nkeep\n# <<< KEEP:one\nb\n"
+        blocks = KEEPBlockValidator.extract_keep_blocks(content)
+        assert blocks == {"one": "# >>> KEEP:one\nkeep\n# <<< KEEP:one"}
+
+    def test_reopened_marker_restarts_block(self):
+        """An opening marker inside an open block restarts it from that line"""
+        content = (
+            "# >>> KEEP:outer\n"
+            "first\n"
+            "# >>> KEEP:inner\n"
+            "second\n"
+            "# <<< KEEP:inner\n"
+            "# <<< KEEP:outer\n"
+        )
+        blocks = KEEPBlockValidator.extract_keep_blocks(content)
+        assert blocks == {"inner": "# >>> KEEP:inner\nsecond\n# <<< KEEP:inner"}
+
+    def test_same_id_reopened_keeps_inner_span(self):
+        content = "# >>> KEEP:a\nx\n# >>> KEEP:a\ny\n# <<< KEEP:a\n"
+        blocks = KEEPBlockValidator.extract_keep_blocks(content)
+        assert blocks == {"a": "# >>> KEEP:a\ny\n# <<< KEEP:a"}
+
+    def test_close_with_other_id_or_longer_id_does_not_close(self):
+        content = "# >>> KEEP:a\n# <<< KEEP:b\n# <<< KEEP:ab\nz\n# <<< KEEP:a"
+        blocks = KEEPBlockValidator.extract_keep_blocks(content)
+        assert blocks == {"a": content}
+
+    def test_unclosed_block_is_ignored(self):
+        content = "# >>> KEEP:a\nx\n"
+        assert KEEPBlockValidator.extract_keep_blocks(content) == {}
@@ -0,0 +1,131 @@
+"""
+Tests for utils.llm_cache write guards and the call_llm_api error path
+"""
+import pytest
+
+from utils import llm_cache, llm_providers
+
+
+@pytest.fixture
+def file_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache._FileCache(tmp_path))
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_SEMANTIC_CACHE", False)
+
+
+class TestRemember:
+    """Only real text responses are stored"""
+
+    def test_stores_text_response(self, file_cache):
+        llm_cache.remember("prompt", "gpt-4o-mini", 100, "answer")
+        assert llm_cache.lookup("prompt", "gpt-4o-mini", 100) == "answer"
+
+    @pytest.mark.parametrize("response", [
+        RuntimeError("boom"), None, b"bytes", 42, "",
+    ])
+    def test_ignores_non_string_or_empty(self, file_cache, response):
+        llm_cache.remember("prompt", "gpt-4o-mini", 100, response)
+        assert llm_cache.lookup("prompt", "gpt-4o-mini", 100) is None
+
+    @pytest.mark.parametrize("response", [
+        "OpenAI API error: timeout", "Anthropic API error: overloaded",
+        "Gemini API error: quota", "LLM API error: unknown",
+    ])
+    def test_ignores_provider_errors(self, file_cache, response):
+        llm_cache.remember("prompt", "gpt-4o-mini", 100, response)
+        assert llm_cache.lookup("prompt", "gpt-4o-mini", 100) is None
+
+    def test_store_ignores_non_string(self, file_cache):
+        llm_cache.store("key", RuntimeError("boom"))
+        assert llm_cache.get_cached("key") is None
+
+    def test_nocache_marker(self, file_cache):
+        llm_cache.remember(f"prompt {llm_cache.NOCACHE_MARKER}", "gpt-4o-mini", 100, "answer")
+        assert llm_cache.lookup(f"prompt {llm_cache.NOCACHE_MARKER}", "gpt-4o-mini", 100) is None
+
+
+class TestMissingKeys:
+    """A missing API key yields the provider's error string, named after the right key"""
+
+    @pytest.mark.parametrize("model, key", [
+        ("claude-3-5-sonnet-latest", "ANTHROPIC_API_KEY"),
+        ("gemini-1.5-pro", "GEMINI_API_KEY"),
+        ("gpt-4o-mini", "OPENAI_API_KEY"),
+    ])
+    def test_call_llm_api_returns_error_string(self, file_cache, monkeypatch, model, key):
+        monkeypatch.delenv(key, raising=False)
+        response = llm_providers.call_llm_api("hello", model=model, max_tokens=10)
+        assert isinstance(response, str)
+        assert response.startswith(llm_cache._ERROR_PREFIXES)
+        assert f"{key} not configured" in response
+        assert llm_cache.lookup("hello", model, 10) is None
+
+
+class TestBadReplies:
+    """A cached reply the caller could not use must not be replayed on retry"""
+
+    @pytest.fixture
+    def provider(self, monkeypatch):
+        calls = []
+
+        def fake_openai(prompt, model="gpt-4o-mini", max_tokens=4000, system_prefix=""):
+            calls.append(prompt)
+            return '{"blockers": 0, "summary": "ok"}'
+
+        monkeypatch.setattr(llm_providers, "call_openai_api", fake_openai)
+        return calls
+
+    def test_refresh_skips_lookup_and_overwrites(self, file_cache, provider):
+        llm_cache.remember("prompt", "gpt-4o-mini", 100, "not json")
+        assert llm_providers.call_llm_api("prompt", max_tokens=100) == "not json"
+        assert provider == []
+        assert llm_providers.call_llm_api("prompt", max_tokens=100, refresh=True).startswith("{")
+        assert provider == ["prompt"]
+        assert llm_cache.lookup("prompt", "gpt-4o-mini", 100).startswith("{")
+
+    def test_forget_llm_response_evicts(self, file_cache, provider):
+        cache_text = llm_providers._cache_text("prompt", "sys")
+        llm_cache.remember(cache_text, "gpt-4o-mini", 100, "not json")
+        llm_providers.forget_llm_response("prompt", max_tokens=100, system_prefix="sys")
+        assert llm_cache.lookup(cache_text, "gpt-4o-mini", 100) is None
+
+    def test_reviewer_retry_reaches_provider(self, file_cache, provider, monkeypatch):
+        from rew_core import llm_reviewer
+
+        monkeypatch.setattr(llm_reviewer.time, "sleep", lambda _s: None)
+        reviewer = llm_reviewer.LLMReviewer(model="gpt-4o-mini", max_tokens=100)
+        prompt = reviewer.create_review_prompt({"title": "t"}, [], "proj")
+        cache_text = llm_providers._cache_text(prompt, llm_reviewer.REVIEW_SYSTEM_PROMPT)
+        llm_cache.remember(cache_text, "gpt-4o-mini", 100, "sorry, no JSON today")
+
+        result = reviewer.run_review({"title": "t"}, [], "proj")
+
+        assert result["summary"] == "ok"
+        assert provider == [prompt]
+        assert llm_cache.lookup(cache_text, "gpt-4o-mini", 100).startswith("{")
+
+
+class TestGeminiConfigure:
+    """genai.configure is process-global: a new key must be applied even when the model is cached"""
+
+    def test_key_change_reconfigures(self, monkeypatch):
+        configured = []
+
+        class FakeGenai:
+            @staticmethod
+            def configure(api_key):
+                configured.append(api_key)
+
+            class GenerativeModel:
+                def __init__(self, model, system_instruction=None):
+                    self.model = model
+
+        monkeypatch.setattr(llm_providers, "genai", FakeGenai)
+        monkeypatch.setattr(llm_providers, "_gemini_api_key", None)
+        llm_providers._gemini_model_for.cache_clear()
+
+        first = llm_providers._gemini_model("key-a", "gemini-1.5-pro", "")
+        assert llm_providers._gemini_model("key-a", "gemini-1.5-pro", "") is first
+        assert llm_providers._gemini_model("key-b", "gemini-1.5-pro", "") is first
+        assert configured == ["key-a", "key-b"]
+        llm_providers._gemini_model_for.cache_clear()
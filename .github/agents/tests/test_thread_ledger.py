@@ -0,0 +1,126 @@
+"""
+Tests for state.thread_ledger (JSON and SQLite backends)
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from state import thread_ledger
+from state.thread_ledger import SQLiteThreadLedger, ThreadLedger
+
+
+@pytest.fixture
+def json_ledger_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(thread_ledger, "LEDGER_ROOT", tmp_path)
+    monkeypatch.setattr(thread_ledger, "LEDGER_BACKEND", "json")
+    return tmp_path
+
+
+@pytest.fixture
+def sqlite_ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr(thread_ledger, "LEDGER_BACKEND", "sqlite")
+    monkeypatch.setattr(thread_ledger, "LEDGER_DB", tmp_path / "ledger.sqlite3")
+    monkeypatch.setattr(thread_ledger, "_sqlite_conn", None)
+    monkeypatch.setattr(thread_ledger, "_sqlite_pid", None)
+    yield
+    if thread_ledger._sqlite_conn is not None:
+        thread_ledger._sqlite_conn.close()
+
+
+class TestJSONLedger:
+    """Default file-per-thread backend"""
+
+    def test_concurrent_appends_keep_every_decision(self, json_ledger_root):
+        """Flat-combined appends from many threads must not lose entries"""
+        threads_count, per_thread = 8, 25
+        barrier = threading.Barrier(threads_count)
+
+        def worker(n):
+            ledger = ThreadLedger("pr-1")
+            barrier.wait()
+            for i in range(per_thread):
+                ledger.append_decision(f"{n}-{i}", actor=f"t{n}")
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads_count)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        notes = [d["note"] for d in ThreadLedger("pr-1").read()["decisions"]]
+        assert len(notes) == threads_count * per_thread
+        assert set(notes) == {f"{n}-{i}" for n in range(threads_count) for i in range(per_thread)}
+        # Per-thread order is preserved
+        for n in range(threads_count):
+            mine = [note for note in notes if note.startswith(f"{n}-")]
+            assert mine == [f"{n}-{i}" for i in range(per_thread)]
+
+    def test_read_sees_external_write(self, json_ledger_root):
+        """The document cache is keyed on the file signature, so an external write is a miss"""
+        ledger = ThreadLedger("pr-2")
+        ledger.set_status("in_progress")
+        assert ledger.read()["status"] == "in_progress"  # now cached
+
+        data = ledger.read()
+        data["status"] = "external-change"
+        ledger.path.write_bytes(thread_ledger._dumps(data))  # bypasses the ledger and its cache
+
+        assert ledger.read()["status"] == "external-change"
+
+    def test_read_returns_independent_copies(self, json_ledger_root):
+        ledger = ThreadLedger("pr-3")
+        first = ledger.read()
+        first["scope"]["must_edit"].append("mutated.py")
+        assert ledger.read()["scope"]["must_edit"] == []
+
+
+class TestSQLiteLedger:
+    """LEDGER_BACKEND=sqlite"""
+
+    def test_backend_switch(self, sqlite_ledger):
+        assert isinstance(ThreadLedger("pr-1"), SQLiteThreadLedger)
+
+    def test_round_trip(self, sqlite_ledger):
+        ledger = ThreadLedger("pr-1")
+        ledger.set_status("review")
+        ledger.set_scope(["a.py"], ["b.py"])
+        ledger.append_decision("first", actor="reviewer")
+        ledger.append_decision("second", actor="dev")
+
+        data = ThreadLedger("pr-1").read()
+        assert data["thread_id"] == "pr-1"
+        assert data["status"] == "review"
+        assert data["scope"] == {"must_edit": ["a.py"], "must_not_edit": ["b.py"]}
+        assert [(d["actor"], d["note"]) for d in data["decisions"]] == [
+            ("reviewer", "first"), ("dev", "second")]
+
+        data["status"] = "done"
+        ledger.write(data)
+        assert ThreadLedger("pr-1").read()["status"] == "done"
+        assert len(ThreadLedger("pr-1").read()["decisions"]) == 2
+
+    def test_threads_are_isolated(self, sqlite_ledger):
+        ThreadLedger("pr-1").append_decision("only here", actor="dev")
+        assert ThreadLedger("pr-2").read()["decisions"] == []
+
+    def test_durable_commits_with_full_sync(self, sqlite_ledger):
+        with thread_ledger._sqlite_tx(durable=True) as conn:
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+        with thread_ledger._sqlite_tx() as conn:
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_failed_commit_rolls_back(self, sqlite_ledger):
+        """A COMMIT that fails must not leave the shared connection inside a transaction"""
+        with thread_ledger._sqlite_tx(write=False) as conn:
+            pass
+        conn.execute("PRAGMA foreign_keys=ON")
+        with pytest.raises(sqlite3.IntegrityError):
+            with thread_ledger._sqlite_tx() as conn:
+                conn.execute("CREATE TEMP TABLE parent (id INTEGER PRIMARY KEY)")
+                conn.execute("CREATE TEMP TABLE child (pid INTEGER REFERENCES parent(id) "
+                             "DEFERRABLE INITIALLY DEFERRED)")
+                conn.execute("INSERT INTO child VALUES (1)")  # violazione rilevata solo al COMMIT
+        assert not conn.in_transaction
+        ThreadLedger("pr-1").append_decision("after failure", actor="dev")
+        assert [d["note"] for d in ThreadLedger("pr-1").read()["decisions"]] == ["after failure"]
@@ -9,7 +9,8 @@ from .diff_processing import (
 
 from .file_validation import (
     get_whitelist_patterns, get_denylist_patterns, paths_from_unified_diff,
-    is_path_allowed, is_path_denied, validate_diff_files, is_path_safe
+    is_path_allowed, is_path_denied, validate_diff_files, is_path_safe,
+    rebuild_matchers
 )
 
 from .github_api import (
@@ -20,7 +21,12 @@ from .github_api import (
     get_token, get_repo_info, rest_request, graphql_request,
     get_pr, get_pr_files, get_pr_comments, update_comment,
     create_pr, get_pr_labels, remove_label, get_repo_details,
-    get_default_branch
+    get_default_branch, get_http_client, clear_github_cache,
+    arest_request, agraphql_request, run_concurrently,
+    aget_issue, apost_issue_comment, aadd_labels, aremove_label,
+    post_issue_comments_many, add_labels_many,
+    aensure_label_exists, aget_issue_node_id, aadd_item_to_project,
+    aset_project_single_select
 )
 
 from .issue_parsing import (
@@ -30,7 +36,9 @@ from .issue_parsing import (
 
 from .llm_providers import (
     call_llm_api, call_openai_api, call_anthropic_api, call_gemini_api,
-    get_preferred_model
+    get_preferred_model, acall_llm_api, acall_many, call_llm_many,
+    call_llm_batch, call_openai_batch, call_anthropic_batch, call_openai_batched,
+    forget_llm_response
 )
 
 from .system_info import (
@@ -46,7 +54,8 @@ __all__ = [
     
     # File validation
     'get_whitelist_patterns', 'get_denylist_patterns', 'paths_from_unified_diff',
-    'is_path_allowed', 'is_path_denied', 'validate_diff_files', 'is_path_safe'
+    'is_path_allowed', 'is_path_denied', 'validate_diff_files', 'is_path_safe',
+    'rebuild_matchers',
     
     # GitHub API
     'get_github_headers', 'get_github_graphql_headers',
@@ -56,7 +65,12 @@ __all__ = [
     'get_token', 'get_repo_info', 'rest_request', 'graphql_request',
     'get_pr', 'get_pr_files', 'get_pr_comments', 'update_comment',
     'create_pr', 'get_pr_labels', 'remove_label', 'get_repo_details',
-    'get_default_branch',
+    'get_default_branch', 'get_http_client', 'clear_github_cache',
+    'arest_request', 'agraphql_request', 'run_concurrently',
+    'aget_issue', 'apost_issue_comment', 'aadd_labels', 'aremove_label',
+    'post_issue_comments_many', 'add_labels_many',
+    'aensure_label_exists', 'aget_issue_node_id', 'aadd_item_to_project',
+    'aset_project_single_select',
     
     # Issue parsing
     'slugify', 'resolve_project_tag', 'extract_requirements_from_issue',
@@ -64,7 +78,9 @@ __all__ = [
     
     # LLM providers
     'call_llm_api', 'call_openai_api', 'call_anthropic_api', 'call_gemini_api',
-    'get_preferred_model',
+    'get_preferred_model', 'acall_llm_api', 'acall_many', 'call_llm_many',
+    'call_llm_batch', 'call_openai_batch', 'call_anthropic_batch', 'call_openai_batched',
+    'forget_llm_response',
     
     # System info
     'validate_environment', 'get_system_info',
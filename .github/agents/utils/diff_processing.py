@@ -9,6 +9,25 @@ import shutil
 from typing import List
 from .file_validation import is_path_safe
 
+# Pattern precompilati: extract_single_diff/apply_diff_* girano su diff fino a 800KB
+# Ogni pattern ha un pre-check su sottostringhe (C, senza backtracking): se manca, il findall
+# sull'intero testo sarebbe comunque vuoto e lo si salta
+_DIFF_BLOCK_PATTERNS = (
+    (re.compile(r"```(?:diff|patch)\s*([\s\S]*?)```"),  # Explicit diff/patch blocks
+     lambda t: "```diff" in t or "```patch" in t),
+    (re.compile(r"```\s*(---[\s\S]*?\+\+\+[\s\S]*?)```"),  # Generic blocks with diff headers
+     lambda t: "---" in t and "+++" in t),
+    (re.compile(r"```\s*([\s\S]*?)```"),  # Any code blocks
+     lambda t: "```" in t),
+)
+_RE_MINUS_HDR = re.compile(r"^--- (?:a/|/dev/null)", re.M)
+_RE_PLUS_HDR = re.compile(r"^\+\+\+ (?:b/|/dev/null)", re.M)
+_RE_HUNK = re.compile(r"^@@.*@@", re.M)
+_RE_MINUS_A = re.compile(r"^--- a/", re.M)
+_RE_MINUS_DEVNULL = re.compile(r"^--- /dev/null", re.M)
+_RE_NEW_FILE_SPLIT = re.compile(r"^--- /dev/null\s*\n\+\+\+ b/", re.M)
+_RE_ADDED_LINE = re.compile(r"^\+(?!\+\+)([^\r\n]*)", re.M)
+
 def extract_single_diff(markdown_text: str) -> str:
     """
     Estrae un unified diff dal testo. Se l'LLM produce più blocchi ```diff/```patch,
@@ -19,15 +38,11 @@ def extract_single_diff(markdown_text: str) -> str:
         raise Exception("Empty response from LLM")
     
     # Try to find diff blocks
-    patterns = [
-        r"```(?:diff|patch)\s*([\s\S]*?)```",  # Explicit diff/patch blocks
-        r"```\s*(---[\s\S]*?\+\+\+[\s\S]*?)```",  # Generic blocks with diff headers
-        r"```\s*([\s\S]*?)```"  # Any code blocks
-    ]
-    
     blocks = []
-    for pattern in patterns:
-        blocks = re.findall(pattern, markdown_text, re.MULTILINE)
+    for pattern, may_match in _DIFF_BLOCK_PATTERNS:
+        if not may_match(markdown_text):
+            continue
+        blocks = pattern.findall(markdown_text)
         if blocks:
             break
     
@@ -42,11 +57,11 @@ def extract_single_diff(markdown_text: str) -> str:
             continue
         # Se il blocco inizia con 'diff --git', ritaglia fino al primo header unificato
         if b.startswith("diff --git"):
-            m = re.search(r"(?m)^--- (?:a/|/dev/null)", b)
+            m = _RE_MINUS_HDR.search(b)
             if m:
                 b = b[m.start():]
         # Considera solo blocchi che hanno almeno l'header unificato
-        if not re.search(r"(?m)^--- (?:a/|/dev/null)", b):
+        if not _RE_MINUS_HDR.search(b):
             continue
         parts.append(b)
 
@@ -57,37 +72,48 @@ def extract_single_diff(markdown_text: str) -> str:
     if not diff:
         raise Exception("Diff block is empty")
 
-    # Normalize line endings and encoding
-    lines = diff.split("\n")
-    cleaned_lines = []
-    for line in lines:
-        # Remove non-ASCII characters that could cause issues
-        cleaned_line = line.encode("ascii", "ignore").decode("ascii")
-        cleaned_lines.append(cleaned_line)
-    diff = "\n".join(lines)  # mantieni UTF-8
-
-    # Enhanced validation (vale anche per diff combinati)
-    if not re.search(r"^--- (?:a/|/dev/null)", diff, flags=re.M):
+    # Encoding: mantieni UTF-8 così com'è (strippare i non-ASCII romperebbe
+    # l'apply su righe di contesto con accenti/emoji)
+
+    # Size check prima di qualsiasi scansione regex
+    if len(diff) > 800_000:
+        raise Exception("Diff too large (>800KB)")
+    
+    # Enhanced validation (vale anche per diff combinati); gli header '---' si contano una volta sola
+    file_count = len(_RE_MINUS_HDR.findall(diff))
+    if not file_count:
         raise Exception("Invalid diff format: must start with '--- a/' or '--- /dev/null'")
     
-    if not re.search(r"^\+\+\+ (?:b/|/dev/null)", diff, flags=re.M):
+    if not _RE_PLUS_HDR.search(diff):
         raise Exception("Invalid diff format: must contain '+++ b/' (or '+++ /dev/null') headers")
     
-    if not re.search(r"^@@.*@@", diff, flags=re.M):
+    if not _RE_HUNK.search(diff):
         raise Exception("Invalid diff format: must contain at least one hunk header '@@'")
     
-    # Size check
-    if len(diff) > 800_000:
-        raise Exception("Diff too large (>800KB)")
-    
     # Check for multiple file headers (limite di sicurezza; multi-file ok entro 20)
-    file_count = len(re.findall(r"^--- (?:a/|/dev/null)", diff, flags=re.M))
     if file_count > 20:
         raise Exception(f"Diff touches too many files ({file_count}). "
                        "Break into smaller changes.")
 
     return diff
 
+def _run_patch_tool(name: str, cmd: List[str], payload: bytes, timeout: int) -> bool:
+    """Run one apply strategy with the diff on stdin; True on exit code 0"""
+    try:
+        result = subprocess.run(
+            cmd, input=payload, capture_output=True, timeout=timeout,
+            env={**os.environ, "GIT_OPTIONAL_LOCKS": "0"}
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        print(f"⚠️ {name} failed: {str(e)[:200]}")
+        return False
+    if result.returncode == 0:
+        print(f"✅ {name} successful")
+        return True
+    output = (result.stderr or result.stdout).decode("utf-8", "replace")
+    print(f"⚠️ {name} failed: {output[:200]}")
+    return False
+
 def apply_diff_resilient(diff_content: str) -> bool:
     """Apply diff with multiple strategies and explicit failure modes"""
     if not diff_content or not diff_content.strip():
@@ -100,74 +126,44 @@ def apply_diff_resilient(diff_content: str) -> bool:
         normalized += "\n"
 
     # Check if this diff contains in-place modifications
-    has_modifications = bool(re.search(r"^--- a/", normalized, flags=re.M))
-    has_new_files = bool(re.search(r"^--- /dev/null", normalized, flags=re.M))
+    has_modifications = bool(_RE_MINUS_A.search(normalized))
+    has_new_files = bool(_RE_MINUS_DEVNULL.search(normalized))
     
     print(f"📋 Diff analysis: modifications={has_modifications}, new_files={has_new_files}")
 
-    path = "/tmp/patch.diff"
-    try:
-        with open(path, "w", encoding="utf-8", newline="\n") as f:
-            f.write(normalized)
+    # Patch passata via stdin: niente file fisso in /tmp condiviso tra agenti concorrenti
+    payload = normalized.encode("utf-8")
 
-        # Strategy 1: git apply with check
-        try:
-            print("🔧 Strategy 1: git apply --check + apply...")
-            result = subprocess.run(
-                ["git", "apply", "--check", "--whitespace=fix", path],
-                capture_output=True, text=True, timeout=60
-            )
-            if result.returncode == 0:
-                subprocess.run(["git", "apply", "--whitespace=fix", path], 
-                             check=True, timeout=120)
-                print("✅ Git apply successful")
-                return True
-            else:
-                print(f"⚠️ Git apply check failed: {result.stderr[:200]}")
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
-            print(f"⚠️ Git apply failed: {str(e)[:200]}")
-
-        # Strategy 2: git apply --3way (better for conflicts)
-        try:
-            print("🔧 Strategy 2: git apply --3way...")
-            subprocess.run(["git", "apply", "--3way", "--whitespace=fix", path], 
-                         check=True, timeout=180)
-            print("✅ Git apply --3way successful")
-            return True
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError) as e:
-            print(f"⚠️ Git apply --3way failed: {str(e)[:200]}")
+    # Strategy 1: git apply (transazionale: se fallisce non tocca il working tree)
+    print("🔧 Strategy 1: git apply...")
+    if _run_patch_tool("Git apply", ["git", "apply", "--whitespace=fix"], payload, timeout=120):
+        return True
 
-        # Strategy 3: patch command
-        if shutil.which("patch"):
-            try:
-                print("🔧 Strategy 3: patch command...")
-                subprocess.run(["patch", "-p1", "-i", path], 
-                             check=True, timeout=180)
-                print("✅ Patch command successful")
-                return True
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
-                print(f"⚠️ Patch command failed: {str(e)[:200]}")
-
-        # Strategy 4: Manual creation (ONLY for new files)
-        if has_modifications and not has_new_files:
-            print("❌ Cannot apply in-place modifications manually")
-            print("   LLM should regenerate with full file content for existing files")
-            return False
-        elif has_new_files:
-            try:
-                print("🔧 Strategy 4: manual file creation...")
-                return apply_diff_manually(normalized)
-            except Exception as e:
-                print(f"⚠️ Manual application failed: {e}")
+    # Strategy 2: git apply --3way (better for conflicts)
+    print("🔧 Strategy 2: git apply --3way...")
+    if _run_patch_tool("Git apply --3way", ["git", "apply", "--3way", "--whitespace=fix"], payload, timeout=180):
+        return True
 
-        print("❌ All diff application strategies failed")
-        return False
+    # Strategy 3: patch command
+    if shutil.which("patch"):
+        print("🔧 Strategy 3: patch command...")
+        if _run_patch_tool("Patch command", ["patch", "-p1"], payload, timeout=180):
+            return True
 
-    finally:
+    # Strategy 4: Manual creation (ONLY for new files)
+    if has_modifications and not has_new_files:
+        print("❌ Cannot apply in-place modifications manually")
+        print("   LLM should regenerate with full file content for existing files")
+        return False
+    elif has_new_files:
         try:
-            os.remove(path)
-        except OSError:
-            pass
+            print("🔧 Strategy 4: manual file creation...")
+            return apply_diff_manually(normalized)
+        except Exception as e:
+            print(f"⚠️ Manual application failed: {e}")
+
+    print("❌ All diff application strategies failed")
+    return False
 
 def apply_diff_manually(diff_content: str) -> bool:
     """
@@ -177,7 +173,7 @@ def apply_diff_manually(diff_content: str) -> bool:
     created_any = False
     
     # Split by new file markers
-    files = re.split(r"(?m)^--- /dev/null\s*\n\+\+\+ b/", diff_content)
+    files = _RE_NEW_FILE_SPLIT.split(diff_content)
     
     # The first split chunk is preamble; subsequent chunks start with file path
     for chunk in files[1:]:
@@ -192,21 +188,9 @@ def apply_diff_manually(diff_content: str) -> bool:
         if not rel_path:
             continue
 
-        # Collect added lines from hunks
-        added_lines = []
-        in_hunk = False
-        
-        for line in file_chunk.splitlines():
-            if line.startswith("@@") and "@@" in line[2:]:
-                in_hunk = True
-                continue
-            
-            if in_hunk:
-                if line.startswith("+") and not line.startswith("+++"):
-                    added_lines.append(line[1:])
-                elif line.startswith("\\"):
-                    # Handle "\ No newline at end of file"
-                    continue
+        # Collect added lines from hunks (dal primo header @@ in poi)
+        hunk = _RE_HUNK.search(file_chunk)
+        added_lines = _RE_ADDED_LINE.findall(file_chunk, hunk.end()) if hunk else []
         
         # Write file if we have content
         if added_lines:
@@ -219,12 +203,12 @@ def apply_diff_manually(diff_content: str) -> bool:
                 if dir_path:
                     os.makedirs(dir_path, exist_ok=True)
                 
-                # Write file
-                with open(rel_path, "w", encoding="utf-8", newline="\n") as f:
-                    content = "\n".join(added_lines)
-                    if not content.endswith("\n"):
-                        content += "\n"
-                    f.write(content)
+                # Write file: payload costruito in memoria, una sola write
+                content = "\n".join(added_lines)
+                if not content.endswith("\n"):
+                    content += "\n"
+                with open(rel_path, "wb") as f:
+                    f.write(content.encode("utf-8"))
                 
                 print(f"✅ Created file: {rel_path}")
                 created_any = True
@@ -5,53 +5,115 @@ File path validation and security guards
 import os
 import re
 import fnmatch
-from typing import List
+from typing import Iterator, List, Tuple
 from pathlib import PurePosixPath
 
-def get_whitelist_patterns() -> List[str]:
+_RE_DIFF_PATH = re.compile(r"^\+\+\+ b/(.+)$", re.M)
+
+# Pattern list immutabili: nessuna allocazione per chiamata
+WHITELIST_PATTERNS: Tuple[str, ...] = (
+    "src/**","lib/**","utils/**","app/**","components/**",
+    "projects/**",  # CRITICAL: Allow projects directory
+    "**/*.py","**/*.js","**/*.ts","**/*.jsx","**/*.tsx",
+    "**/*.java","**/*.go","**/*.rs","**/*.php","**/*.rb",
+    "**/*.css","**/*.scss","**/*.html","**/*.vue","**/*.svelte",
+    "tests/**","test/**","__tests__/**","spec/**",
+    "docs/**","documentation/**",
+    "*.md","*.txt","*.rst","*.yml","*.yaml","*.json",
+    "LICENSE*","README*","CHANGELOG*","CONTRIBUTING*",
+    "package.json","requirements.txt","Cargo.toml","go.mod"
+)
+
+DENYLIST_PATTERNS: Tuple[str, ...] = (
+    ".github/**",".git/**","infra/**","infrastructure/**",
+    "deploy/**","deployment/**","k8s/**","terraform/**",
+    "**/*.env","**/.env.*","**/secrets/**","**/secret/**",
+    "**/id_rsa*","**/*.key","**/*.pem","**/*.p12","**/*.jks",
+    "ssh/*","**/ssh/**",".aws/**","config/secrets/**",
+    "**/credentials*","**/*credential*","**/token*",
+    "**/docker-compose*.yml","**/Dockerfile*","**/*.dockerfile",
+    "node_modules/**","vendor/**","venv/**","__pycache__/**",
+    "*.log","**/*.log","logs/**","tmp/**","temp/**"
+)
+
+def get_whitelist_patterns() -> Tuple[str, ...]:
     """File patterns that are allowed to be modified"""
-    return [
-        "src/**","lib/**","utils/**","app/**","components/**",
-        "projects/**",  # CRITICAL: Allow projects directory
-        "**/*.py","**/*.js","**/*.ts","**/*.jsx","**/*.tsx",
-        "**/*.java","**/*.go","**/*.rs","**/*.php","**/*.rb",
-        "**/*.css","**/*.scss","**/*.html","**/*.vue","**/*.svelte",
-        "tests/**","test/**","__tests__/**","spec/**",
-        "docs/**","documentation/**",
-        "*.md","*.txt","*.rst","*.yml","*.yaml","*.json",
-        "LICENSE*","README*","CHANGELOG*","CONTRIBUTING*",
-        "package.json","requirements.txt","Cargo.toml","go.mod"
-    ]
-
-def get_denylist_patterns() -> List[str]:
+    return WHITELIST_PATTERNS
+
+def get_denylist_patterns() -> Tuple[str, ...]:
     """File patterns that are never allowed to be modified"""
-    return [
-        ".github/**",".git/**","infra/**","infrastructure/**",
-        "deploy/**","deployment/**","k8s/**","terraform/**",
-        "**/*.env","**/.env.*","**/secrets/**","**/secret/**",
-        "**/id_rsa*","**/*.key","**/*.pem","**/*.p12","**/*.jks",
-        "ssh/*","**/ssh/**",".aws/**","config/secrets/**",
-        "**/credentials*","**/*credential*","**/token*",
-        "**/docker-compose*.yml","**/Dockerfile*","**/*.dockerfile",
-        "node_modules/**","vendor/**","venv/**","__pycache__/**",
-        "*.log","**/*.log","logs/**","tmp/**","temp/**"
-    ]
+    return DENYLIST_PATTERNS
+
+def _iter_diff_paths(diff: str) -> Iterator[str]:
+    """Yield each '+++ b/' path once, in diff order, while scanning"""
+    seen = set()
+    for m in _RE_DIFF_PATH.finditer(diff):
+        path = m.group(1).split("\t", 1)[0].strip()
+        if path not in seen:
+            seen.add(path)
+            yield path
 
 def paths_from_unified_diff(diff: str) -> List[str]:
     """Extract file paths from unified diff"""
-    files = []
-    for m in re.finditer(r"^\+\+\+ b/(.+)$", diff, flags=re.M):
-        path = m.group(1).split("\t")[0].strip()
-        files.append(path)
-    return list(set(files))
+    return list(_iter_diff_paths(diff))
+
+_SEP_RE = re.escape(os.path.normcase("/"))
+
+def _glob_to_regex(pattern: str) -> str:
+    pattern = os.path.normcase(pattern)
+    prefix = ""
+    # Come gitignore: '**/' iniziale = zero o più directory, quindi vale anche alla root
+    # (con fnmatch puro '**/docker-compose*.yml' non copriva ./docker-compose.yml)
+    if pattern.startswith(os.path.normcase("**/")):
+        pattern, prefix = pattern[3:], f"(?:.*{_SEP_RE})?"
+    return f"(?:{prefix}{fnmatch.translate(pattern)})"
+
+def _compile_globs(patterns: Tuple[str, ...]) -> "re.Pattern[str]":
+    """Compile globs into one alternation: fnmatch semantics, plus gitignore-style leading '**/'"""
+    if not patterns:
+        return re.compile(r"(?!)")  # alternation vuota: non deve matchare nulla
+    return re.compile("|".join(_glob_to_regex(p) for p in patterns))
+
+_GLOB_CHARS = frozenset("*?[")
+
+def _split_suffix_globs(patterns: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Split out pure extension globs ('*.ext' / '**/*.ext'): for those a match is just
+    path.endswith('.ext') (fnmatch '*' crosses '/'), one C call for the whole tuple.
+    """
+    suffixes, rest = [], []
+    for p in patterns:
+        tail = p[3:] if p.startswith("**/") else p
+        ext = tail[1:]
+        if tail.startswith("*.") and "/" not in ext and not _GLOB_CHARS.intersection(ext):
+            suffixes.append(os.path.normcase(ext))
+        else:
+            rest.append(p)
+    return tuple(dict.fromkeys(suffixes)), tuple(rest)
+
+def rebuild_matchers() -> None:
+    """Recompile the path matchers after WHITELIST_PATTERNS/DENYLIST_PATTERNS are reassigned (e.g. monkeypatch in tests)"""
+    global _WHITELIST_SUFFIXES, _WHITELIST_RE, _DENYLIST_SUFFIXES, _DENYLIST_RE
+    _WHITELIST_SUFFIXES, whitelist_globs = _split_suffix_globs(WHITELIST_PATTERNS)
+    _DENYLIST_SUFFIXES, denylist_globs = _split_suffix_globs(DENYLIST_PATTERNS)
+    _WHITELIST_RE = _compile_globs(whitelist_globs)
+    _DENYLIST_RE = _compile_globs(denylist_globs)
+
+rebuild_matchers()
+
+def _allowed(pc: str) -> bool:
+    return pc.endswith(_WHITELIST_SUFFIXES) or _WHITELIST_RE.match(pc) is not None
+
+def _denied(pc: str) -> bool:
+    return pc.endswith(_DENYLIST_SUFFIXES) or _DENYLIST_RE.match(pc) is not None
 
 def is_path_allowed(path: str) -> bool:
     """Check if path matches whitelist patterns"""
-    return any(fnmatch.fnmatch(path, p) for p in get_whitelist_patterns())
+    return _allowed(os.path.normcase(path))
 
 def is_path_denied(path: str) -> bool:
     """Check if path matches denylist patterns"""
-    return any(fnmatch.fnmatch(path, p) for p in get_denylist_patterns())
+    return _denied(os.path.normcase(path))
 
 def is_path_safe(path: str) -> bool:
     """Reject absolute paths and path traversal (..). Enforce POSIX-ish cleanliness."""
@@ -72,27 +134,34 @@ def validate_diff_files(
     diff_content: str,
     project_root: str | None = None,
     *,
-    allow_project_readme: bool = True
+    allow_project_readme: bool = True,
+    fail_fast: bool = False
 ) -> None:
     """
     Validate that diff only touches allowed files.
     If project_root is provided (or PROJECT_ROOT/DEV_PROJECT_ROOT env vars are set),
     all paths MUST live under that root (exception: <root>/README.md when allow_project_readme=True).
+    With fail_fast=True raises on the first offending path instead of collecting all violations.
     """
-    files = paths_from_unified_diff(diff_content)
     violations = []
     
     # Resolve effective project root (param > env: PROJECT_ROOT > env: DEV_PROJECT_ROOT)
     root = project_root or os.getenv("PROJECT_ROOT") or os.getenv("DEV_PROJECT_ROOT")
     root_norm = _normalize_root(root) if root else None
     
-    for p in files:
+    # Estrazione e validazione nello stesso passaggio: con fail_fast il resto del diff non viene scansionato
+    for p in _iter_diff_paths(diff_content):
+        pc = os.path.normcase(p)
         if not is_path_safe(p):
             violations.append(f"{p} (unsafe path)")
-        if not is_path_allowed(p):
-            violations.append(f"{p} (not in whitelist)")
-        if is_path_denied(p):
+        # Denylist è terminale: whitelist e root non cambiano l'esito
+        if _denied(pc):
             violations.append(f"{p} (in denylist)")
+            if fail_fast:
+                break
+            continue
+        if not _allowed(pc):
+            violations.append(f"{p} (not in whitelist)")
         
         # Enforce project root (if provided)
         if root_norm:
@@ -100,6 +169,9 @@ def validate_diff_files(
             allowed = pn.startswith(root_norm + "/") or (allow_project_readme and pn == f"{root_norm}/README.md")
             if not allowed:
                 violations.append(f"{p} (outside project root '{root_norm}')")
+        
+        if fail_fast and violations:
+            break
     
     if violations:
         raise Exception(f"Diff contains unauthorized files: {violations}")
@@ -3,13 +3,78 @@
 GitHub API utilities - REST & GraphQL operations (unified for dev + reviewer)
 """
 import os
+import re
 import json
-from typing import List, Optional, Dict, Tuple
+import time
+import atexit
+import random
+import asyncio
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, List, Optional, Dict, Set, Tuple
 import httpx
 
+try:  # HTTP/2 richiede il pacchetto opzionale 'h2' (httpx[http2])
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+try:
+    import orjson
+except ImportError:  # fallback stdlib
+    orjson = None
+
 # Configuration constants
 TIMEOUT_DEFAULT = 60
 TIMEOUT_GRAPHQL = 40
+API_BASE_URL = "https://api.github.com"
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_RETRY_MAX_DELAY = 30.0
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "60"))
+GITHUB_GET_CACHE_TTL = float(os.getenv("GITHUB_GET_CACHE_TTL", "120"))
+GITHUB_ETAG_CACHE_SIZE = 256
+_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60)
+
+# Client condiviso (keep-alive + pool): evita handshake TCP/TLS a ogni chiamata
+_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+def _get_client() -> httpx.Client:
+    """Return the process-wide pooled client (re-created after fork)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            # Nessun retry nel transport: connessioni fallite, 429 e 5xx li gestisce solo _send_with_retry
+            _client = httpx.Client(
+                base_url=API_BASE_URL,
+                timeout=TIMEOUT_DEFAULT,
+                transport=httpx.HTTPTransport(http2=_HTTP2, limits=_POOL_LIMITS),
+            )
+            _client_pid = pid
+    return _client
+
+def get_http_client() -> httpx.Client:
+    """Shared pooled client for other GitHub callers (do not close it)"""
+    return _get_client()
+
+def close_client() -> None:
+    """Close the pooled client (registered at exit)"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
+
+atexit.register(close_client)
 
 def _require_env(name: str) -> str:
     v = os.environ.get(name)
@@ -24,49 +89,86 @@ def get_token() -> str:
         raise RuntimeError("Missing token (GH_CLASSIC_TOKEN/GITHUB_TOKEN)")
     return tkn
 
-def get_github_headers() -> dict:
-    return {
-        "Authorization": f"Bearer {get_token()}",
+@lru_cache(maxsize=4)
+def _headers_for(token: str, graphql: bool = False) -> Dict[str, str]:
+    headers = {
+        "Authorization": f"Bearer {token}",
         "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28",
         "User-Agent": "ai-developer/unified"
     }
+    if graphql:
+        headers["Content-Type"] = "application/json"  # body già serializzato, vedi _json_body
+    else:
+        headers["X-GitHub-Api-Version"] = "2022-11-28"
+    return headers
+
+def get_github_headers() -> dict:
+    """REST headers (cached per token value; treat as read-only)"""
+    return _headers_for(get_token())
 
 def get_github_graphql_headers() -> dict:
-    """GraphQL headers - prefer classic token for project access"""
+    """GraphQL headers - prefer classic token for project access (cached per token; read-only)"""
     token = os.environ.get("GH_CLASSIC_TOKEN") or os.environ.get("GITHUB_TOKEN")
     if not token:
         raise RuntimeError("Missing GH_CLASSIC_TOKEN/GITHUB_TOKEN for GraphQL")
-    return {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "ai-developer/unified"
-    }
+    return _headers_for(token, graphql=True)
 
-def rest_request(method: str, path: str, timeout: int = TIMEOUT_DEFAULT, **kwargs) -> Optional[Dict]:
-    """Unified REST API request handler"""
-    url = f"https://api.github.com{path}"
-    with httpx.Client(timeout=timeout) as client:
-        response = client.request(method, url, headers=get_github_headers(), **kwargs)
-    
+# Body GraphQL serializzato direttamente in bytes (orjson) invece di json= di httpx
+def _json_body(data: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+# Conditional GET: ETag + body per (path, params); un 304 non consuma quota REST e non ritrasferisce il body
+_ETAGS: Dict[Tuple[str, Tuple], Tuple[str, bytes]] = {}
+
+def _error_snippet(response: httpx.Response) -> str:
+    # Decodifica solo i primi 300 byte del body, non l'intero .text
+    return response.content[:300].decode("utf-8", "replace")
+
+def _get_key(method: str, path: str, kwargs: Dict[str, Any]) -> Optional[Tuple[str, Tuple]]:
+    """Cache key for plain GETs (path + dict params), None for anything else"""
+    params = kwargs.get("params") or {}
+    if method != "GET" or set(kwargs) - {"params"} or not isinstance(params, dict):
+        return None
+    return path, tuple(sorted(params.items()))
+
+def _request_headers(key: Optional[Tuple[str, Tuple]]) -> Dict[str, str]:
+    cached = _ETAGS.get(key) if key is not None else None
+    if cached is None:
+        return get_github_headers()
+    return {**get_github_headers(), "If-None-Match": cached[0]}
+
+def _rest_content(method: str, path: str, response: httpx.Response, key: Optional[Tuple[str, Tuple]] = None) -> bytes:
+    if key is not None and response.status_code == 304:
+        cached = _ETAGS.get(key)
+        if cached is not None:
+            return cached[1]
     if response.status_code >= 400:
-        raise RuntimeError(f"REST {method} {path} -> {response.status_code}: {response.text[:300]}")
-    
-    return response.json() if response.text else None
+        raise RuntimeError(f"REST {method} {path} -> {response.status_code}: {_error_snippet(response)}")
+    if method != "GET":
+        _GET_CACHE.clear()  # una scrittura può rendere stantio qualsiasi GET in cache
+    elif key is not None and response.status_code == 200:
+        etag = response.headers.get("etag")
+        if etag:
+            _ETAGS.pop(key, None)
+            _ETAGS[key] = (etag, response.content)
+            if len(_ETAGS) > GITHUB_ETAG_CACHE_SIZE:
+                _ETAGS.pop(next(iter(_ETAGS)))  # il più vecchio (ordine di inserimento)
+    return response.content
 
-def graphql_request(query: str, variables: dict, timeout: int = TIMEOUT_GRAPHQL) -> Dict:
-    """Unified GraphQL request handler"""
-    url = "https://api.github.com/graphql"
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, headers=get_github_graphql_headers(), json={
-            "query": query, 
-            "variables": variables
-        })
-    
+def _rest_result(method: str, path: str, response: httpx.Response, key: Optional[Tuple[str, Tuple]] = None) -> Optional[Dict]:
+    content = _rest_content(method, path, response, key)
+    return _json_loads(content) if content else None
+
+def _graphql_result(response: httpx.Response) -> Dict:
     if response.status_code >= 400:
-        raise RuntimeError(f"GraphQL HTTP {response.status_code}: {response.text[:300]}")
+        raise RuntimeError(f"GraphQL HTTP {response.status_code}: {_error_snippet(response)}")
     
-    data = response.json()
+    data = _json_loads(response.content)
     if "errors" in data:
         error_msg = str(data["errors"])
         if any(term in error_msg.lower() for term in ["scope", "permission", "forbidden"]):
@@ -75,6 +177,180 @@ def graphql_request(query: str, variables: dict, timeout: int = TIMEOUT_GRAPHQL)
     
     return data["data"]
 
+# ==== Retry: 5xx/errori di trasporto con backoff, rate limit secondo Retry-After/X-RateLimit-Reset ====
+# Scritture (POST/PATCH, mutation GraphQL) non sono idempotenti: dopo un 5xx o un timeout in lettura
+# il server può averle già applicate, quindi si ritentano solo se la richiesta non è mai partita
+# (connessione fallita) o è stata respinta per rate limit.
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+def _is_mutation(query: str) -> bool:
+    return query.lstrip().startswith("mutation")
+
+def _rate_limited(response: httpx.Response, graphql: bool) -> bool:
+    status = response.status_code
+    if status == 429:
+        return True
+    if status == 403:
+        # Primary (remaining=0) o secondary rate limit (Retry-After); gli altri 403 sono permessi mancanti
+        return response.headers.get("x-ratelimit-remaining") == "0" or "retry-after" in response.headers
+    return graphql and status == 200 and b'"RATE_LIMITED"' in response.content
+
+def _retry_wait(response: Optional[httpx.Response], attempt: int, graphql: bool,
+                idempotent: bool = True) -> Optional[float]:
+    """Seconds to sleep before the next attempt, or None when the response is final"""
+    if response is not None:
+        if _rate_limited(response, graphql):
+            retry_after = response.headers.get("retry-after", "")
+            reset = response.headers.get("x-ratelimit-reset", "")
+            if retry_after.isdigit():
+                wait = float(retry_after)
+            elif reset.isdigit():
+                wait = max(0.0, int(reset) - time.time()) + 1
+            else:
+                wait = None
+            if wait is not None:
+                # Reset lontano (fino a 1h): meglio fallire subito che bloccare il workflow
+                return wait if wait <= GITHUB_RATE_LIMIT_MAX_WAIT else None
+        elif response.status_code < 500 or not idempotent:
+            return None
+    # 5xx / errore di trasporto ritentabile: exponential backoff con jitter
+    return min(GITHUB_RETRY_MAX_DELAY, 2.0 ** attempt) * (1 + random.uniform(0, 0.5))
+
+def _send_with_retry(send: Callable[[], httpx.Response], graphql: bool = False,
+                     idempotent: bool = True) -> httpx.Response:
+    for attempt in range(GITHUB_MAX_RETRIES + 1):
+        last = attempt >= GITHUB_MAX_RETRIES
+        try:
+            response = send()
+        except httpx.TransportError as e:
+            if last or not (idempotent or isinstance(e, _NOT_SENT_ERRORS)):
+                raise
+            response, reason = None, type(e).__name__
+        else:
+            reason = "RATE_LIMITED" if response.status_code == 200 else f"HTTP {response.status_code}"
+        wait = None if last else _retry_wait(response, attempt, graphql, idempotent)
+        if wait is None:
+            return response
+        print(f"⚠️ GitHub API {reason}, retry {attempt + 1}/{GITHUB_MAX_RETRIES} in {wait:.1f}s")
+        time.sleep(wait)
+
+async def _asend_with_retry(send: Callable[[], Awaitable[httpx.Response]], graphql: bool = False,
+                            idempotent: bool = True) -> httpx.Response:
+    for attempt in range(GITHUB_MAX_RETRIES + 1):
+        last = attempt >= GITHUB_MAX_RETRIES
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            if last or not (idempotent or isinstance(e, _NOT_SENT_ERRORS)):
+                raise
+            response, reason = None, type(e).__name__
+        else:
+            reason = "RATE_LIMITED" if response.status_code == 200 else f"HTTP {response.status_code}"
+        wait = None if last else _retry_wait(response, attempt, graphql, idempotent)
+        if wait is None:
+            return response
+        print(f"⚠️ GitHub API {reason}, retry {attempt + 1}/{GITHUB_MAX_RETRIES} in {wait:.1f}s")
+        await asyncio.sleep(wait)
+
+def rest_request(method: str, path: str, timeout: int = TIMEOUT_DEFAULT, **kwargs) -> Optional[Dict]:
+    """
+    Unified REST API request handler. Rate limits and failed connections are always retried;
+    5xx and other transport errors only for idempotent methods. GETs revalidate via ETag.
+    """
+    key = _get_key(method, path, kwargs)
+    headers = _request_headers(key)
+    response = _send_with_retry(lambda: _get_client().request(
+        method, path, headers=headers, timeout=timeout, **kwargs), idempotent=method.upper() in _IDEMPOTENT_METHODS)
+    return _rest_result(method, path, response, key)
+
+# Cache TTL per GET idempotenti ripetuti nello stesso run (dettagli repo; non le label, che cambiano nel run).
+# Si tengono i byte e non l'oggetto: ogni hit riparsa (orjson), così i chiamanti non possono alterare la cache
+_GET_CACHE: Dict[Tuple[str, Tuple], Tuple[float, bytes]] = {}
+
+def _cached_get(path: str, params: Optional[Dict[str, Any]] = None, ttl: float = GITHUB_GET_CACHE_TTL) -> Optional[Any]:
+    key = _get_key("GET", path, {"params": params})
+    entry = _GET_CACHE.get(key)
+    if entry is None or time.monotonic() - entry[0] > ttl:
+        headers = _request_headers(key)  # scaduto il TTL si rivalida con l'ETag
+        response = _send_with_retry(lambda: _get_client().get(path, headers=headers, params=params))
+        entry = _GET_CACHE[key] = (time.monotonic(), _rest_content("GET", path, response, key))
+    return _json_loads(entry[1]) if entry[1] else None
+
+def clear_github_cache() -> None:
+    """Drop cached GET responses, ETags and ensured labels (tests, or after out-of-band changes)"""
+    _GET_CACHE.clear()
+    _ETAGS.clear()
+    _ENSURED_LABELS.clear()
+
+def graphql_request(query: str, variables: dict, timeout: int = TIMEOUT_GRAPHQL) -> Dict:
+    """Unified GraphQL request handler (queries retry like GETs, mutations like POSTs; plus RATE_LIMITED errors)"""
+    body = _json_body({"query": query, "variables": variables})
+    response = _send_with_retry(lambda: _get_client().post(
+        "/graphql", headers=get_github_graphql_headers(), timeout=timeout, content=body),
+        graphql=True, idempotent=not _is_mutation(query))
+    return _graphql_result(response)
+
+# ==== Async variants (per chiamate indipendenti in parallelo) ====
+
+# Un AsyncClient è legato all'event loop su cui apre le connessioni: uno per loop
+_aclients: Dict[int, httpx.AsyncClient] = {}
+
+def _get_async_client() -> httpx.AsyncClient:
+    loop_id = id(asyncio.get_running_loop())
+    client = _aclients.get(loop_id)
+    if client is None:
+        client = _aclients[loop_id] = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            timeout=TIMEOUT_DEFAULT,
+            transport=httpx.AsyncHTTPTransport(http2=_HTTP2, limits=_POOL_LIMITS),
+        )
+    return client
+
+async def _aclose_async_client() -> None:
+    client = _aclients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+async def arest_request(method: str, path: str, timeout: int = TIMEOUT_DEFAULT, **kwargs) -> Optional[Dict]:
+    """Async counterpart of rest_request"""
+    key = _get_key(method, path, kwargs)
+    headers = _request_headers(key)
+    response = await _asend_with_retry(lambda: _get_async_client().request(
+        method, path, headers=headers, timeout=timeout, **kwargs), idempotent=method.upper() in _IDEMPOTENT_METHODS)
+    return _rest_result(method, path, response, key)
+
+async def agraphql_request(query: str, variables: dict, timeout: int = TIMEOUT_GRAPHQL) -> Dict:
+    """Async counterpart of graphql_request"""
+    body = _json_body({"query": query, "variables": variables})
+    response = await _asend_with_retry(lambda: _get_async_client().post(
+        "/graphql", headers=get_github_graphql_headers(), timeout=timeout, content=body),
+        graphql=True, idempotent=not _is_mutation(query))
+    return _graphql_result(response)
+
+def run_concurrently(*calls: Awaitable[Any]) -> List[Any]:
+    """
+    Run independent async GitHub calls concurrently from sync code.
+    Returns results in order; a failed call yields its exception instead of raising.
+    """
+    async def _runner() -> List[Any]:
+        try:
+            return await asyncio.gather(*calls, return_exceptions=True)
+        finally:
+            await _aclose_async_client()
+    
+    return asyncio.run(_runner())
+
+# Il payload dell'evento non cambia durante un run: letto e parsato una volta per path
+@lru_cache(maxsize=2)
+def _github_event(event_path: str) -> Optional[Dict]:
+    try:
+        with open(event_path, "rb") as f:
+            return _json_loads(f.read())
+    except FileNotFoundError:
+        return None
+
 def get_repo_info() -> Tuple[str, str]:
     """Get owner and repo from environment or event"""
     full = os.getenv("GITHUB_REPOSITORY", "")
@@ -84,9 +360,8 @@ def get_repo_info() -> Tuple[str, str]:
     
     # Fallback to GitHub event
     event_path = os.getenv("GITHUB_EVENT_PATH")
-    if event_path and os.path.exists(event_path):
-        with open(event_path, "r", encoding="utf-8") as f:
-            event = json.load(f)
+    event = _github_event(event_path) if event_path else None
+    if event is not None:
         repo_info = event.get("repository", {})
         return repo_info["owner"]["login"], repo_info["name"]
     
@@ -98,18 +373,46 @@ def get_issue(owner: str, repo: str, issue_number: int) -> Dict:
     """Get issue details"""
     return rest_request("GET", f"/repos/{owner}/{repo}/issues/{issue_number}")
 
+async def aget_issue(owner: str, repo: str, issue_number: int) -> Dict:
+    """Async variant of get_issue"""
+    return await arest_request("GET", f"/repos/{owner}/{repo}/issues/{issue_number}")
+
 def get_pr(owner: str, repo: str, pr_number: int) -> Dict:
     """Get pull request details"""
     return rest_request("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}")
 
+_RE_LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
 def get_pr_files(owner: str, repo: str, pr_number: int) -> List[Dict]:
-    """Get files changed in PR with pagination support"""
-    all_files = []
-    page = 1
+    """Get files changed in PR with pagination support (pages after the first fetched concurrently)"""
+    path = f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
     per_page = 100
     
+    # Pagina 1 in sync: dal Link rel="last" si ricava quante pagine restano
+    params = {"per_page": per_page, "page": 1}
+    key = _get_key("GET", path, {"params": params})
+    headers = _request_headers(key)
+    response = _send_with_retry(lambda: _get_client().get(path, headers=headers, params=params))
+    first = _rest_result("GET", path, response, key) or []
+    if len(first) < per_page:
+        return first
+    
+    m = _RE_LAST_PAGE.search(response.headers.get("link", ""))
+    if m:
+        pages = run_concurrently(*(
+            arest_request("GET", path, params={"per_page": per_page, "page": page})
+            for page in range(2, int(m.group(1)) + 1)
+        ))
+        for result in pages:
+            if isinstance(result, BaseException):
+                raise result
+        return first + [f for chunk in pages for f in (chunk or [])]
+    
+    # Nessun Link (es. 304 senza header): paginazione sequenziale
+    all_files = list(first)
+    page = 2
     while True:
-        chunk = rest_request("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}/files", params={
+        chunk = rest_request("GET", path, params={
             "per_page": per_page,
             "page": page
         })
@@ -134,6 +437,12 @@ def post_issue_comment(owner: str, repo: str, issue_number: int, body: str) -> D
         "body": body
     })
 
+async def apost_issue_comment(owner: str, repo: str, issue_number: int, body: str) -> Dict:
+    """Async variant of post_issue_comment"""
+    return await arest_request("POST", f"/repos/{owner}/{repo}/issues/{issue_number}/comments", json={
+        "body": body
+    })
+
 def update_comment(owner: str, repo: str, comment_id: int, body: str) -> Dict:
     """Update existing comment"""
     return rest_request("PATCH", f"/repos/{owner}/{repo}/issues/comments/{comment_id}", json={
@@ -159,7 +468,9 @@ def create_pr(owner: str, repo: str, base: str, head: str, title: str, body: str
 # ==== Label Operations ====
 
 def get_pr_labels(owner: str, repo: str, pr_number: int) -> List[Dict]:
-    """Get labels attached to PR/issue"""
+    """Get labels attached to PR/issue (always revalidated: conditional GET, no TTL cache)"""
+    # Le label vengono lette, modificate e rilette nello stesso run (anche da altri job):
+    # niente TTL, solo ETag, così un 304 resta economico ma il dato non è mai stantio
     try:
         return rest_request("GET", f"/repos/{owner}/{repo}/issues/{pr_number}/labels") or []
     except Exception:
@@ -171,6 +482,24 @@ def add_labels(owner: str, repo: str, issue_number: int, labels: List[str]) -> N
         "labels": labels
     })
 
+async def aadd_labels(owner: str, repo: str, issue_number: int, labels: List[str]) -> None:
+    """Async variant of add_labels"""
+    await arest_request("POST", f"/repos/{owner}/{repo}/issues/{issue_number}/labels", json={
+        "labels": labels
+    })
+
+# Fan-out su più issue: richieste in parallelo sullo stesso AsyncClient (multiplexing HTTP/2 se disponibile)
+def post_issue_comments_many(items: List[Tuple[str, str, int, str]]) -> List[Any]:
+    """
+    Post (owner, repo, issue_number, body) comments concurrently.
+    Results keep input order; a failed post yields its exception instead of raising.
+    """
+    return run_concurrently(*(apost_issue_comment(*item) for item in items))
+
+def add_labels_many(items: List[Tuple[str, str, int, List[str]]]) -> List[Any]:
+    """Add (owner, repo, issue_number, labels) concurrently; same result convention as post_issue_comments_many"""
+    return run_concurrently(*(aadd_labels(*item) for item in items))
+
 def remove_label(owner: str, repo: str, issue_number: int, label: str) -> None:
     """Remove label from issue/PR"""
     try:
@@ -178,41 +507,100 @@ def remove_label(owner: str, repo: str, issue_number: int, label: str) -> None:
     except Exception:
         pass  # Label might not exist
 
+async def aremove_label(owner: str, repo: str, issue_number: int, label: str) -> None:
+    """Async variant of remove_label"""
+    try:
+        await arest_request("DELETE", f"/repos/{owner}/{repo}/issues/{issue_number}/labels/{label}")
+    except Exception:
+        pass  # Label might not exist
+
 def add_labels_to_issue(owner: str, repo: str, issue_number: int, labels: List[str]) -> None:
     """Alias for backward compatibility"""
     add_labels(owner, repo, issue_number, labels)
 
+def _label_already_exists(response: httpx.Response) -> bool:
+    """422 con errors[].code == 'already_exists' (letto dal JSON, non dal testo)"""
+    if response.status_code != 422:
+        return False
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any(isinstance(e, dict) and e.get("code") == "already_exists" for e in errors)
+
+# Label già create/verificate in questo processo: nessun POST ripetuto per la stessa (owner, repo, name)
+_ENSURED_LABELS: Set[Tuple[str, str, str]] = set()
+
 def ensure_label_exists(owner: str, repo: str, name: str, color: str = "0E8A16", description: str = "") -> None:
     """Create label if missing; ignore if it already exists"""
-    base_path = f"/repos/{owner}/{repo}/labels"
-    
-    # Check if exists
-    try:
-        rest_request("GET", f"{base_path}/{name}")
-        return  # Label exists
-    except RuntimeError:
-        pass  # Label doesn't exist, create it
+    key = (owner, repo, name)
+    if key in _ENSURED_LABELS:
+        return
+    # Create speculatively: one round-trip, 422 'already_exists' is the hot path
+    path = f"/repos/{owner}/{repo}/labels"
+    payload = {
+        "name": name,
+        "color": color.lstrip("#"),
+        "description": description or ""
+    }
     
-    # Create label
+    # POST ripetibile: un replay dopo una creazione riuscita torna 422 already_exists, trattato come successo
+    response = _send_with_retry(lambda: _get_client().post(path, headers=get_github_headers(), json=payload), idempotent=True)
+    if not _label_already_exists(response):
+        _rest_result("POST", path, response)
+    _ENSURED_LABELS.add(key)
+
+async def aensure_label_exists(owner: str, repo: str, name: str, color: str = "0E8A16", description: str = "") -> None:
+    """Async variant of ensure_label_exists: speculative create, 'already_exists' counts as success"""
+    key = (owner, repo, name)
+    if key in _ENSURED_LABELS:
+        return
+    path = f"/repos/{owner}/{repo}/labels"
     payload = {
         "name": name,
         "color": color.lstrip("#"),
         "description": description or ""
     }
     
-    try:
-        rest_request("POST", base_path, json=payload)
-    except RuntimeError as e:
-        # Handle race condition - ignore if already exists
-        if "already_exists" in str(e).lower():
-            return
-        raise
+    response = await _asend_with_retry(lambda: _get_async_client().post(path, headers=get_github_headers(), json=payload),
+                                       idempotent=True)
+    if not _label_already_exists(response):
+        _rest_result("POST", path, response)
+    _ENSURED_LABELS.add(key)
 
 # ==== Repository Operations ====
 
 def get_repo_details(owner: str, repo: str) -> Dict:
-    """Get repository details"""
-    return rest_request("GET", f"/repos/{owner}/{repo}")
+    """Get repository details (cached for GITHUB_GET_CACHE_TTL seconds)"""
+    return _cached_get(f"/repos/{owner}/{repo}")
+
+# Il linguaggio del repo non cambia durante un run: cache in-process + su disco (TTL 1h)
+REPO_LANGUAGE_TTL = 3600
+
+@lru_cache(maxsize=8)
+def _repo_language(owner: str, repo: str) -> Optional[str]:
+    digest = hashlib.md5(f"{owner}/{repo}".encode("utf-8")).hexdigest()
+    cache_path = Path(tempfile.gettempdir()) / f"repo_lang_{digest}"
+    try:
+        if time.time() - cache_path.stat().st_mtime < REPO_LANGUAGE_TTL:
+            cached = cache_path.read_text(encoding="utf-8").strip()
+            if cached:
+                return cached
+    except OSError:
+        pass
+    
+    languages = rest_request("GET", f"/repos/{owner}/{repo}/languages")
+    if not languages:
+        return None
+    # Most-used language
+    language = max(languages.items(), key=itemgetter(1))[0]
+    try:
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(language, encoding="utf-8")
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # cache su disco best-effort
+    return language
 
 def get_repo_language(owner: Optional[str] = None, repo: Optional[str] = None) -> str:
     """Get primary language of repository"""
@@ -223,11 +611,7 @@ def get_repo_language(owner: Optional[str] = None, repo: Optional[str] = None) -
             return "Python"
     
     try:
-        languages = rest_request("GET", f"/repos/{owner}/{repo}/languages")
-        if not languages:
-            return "Python"
-        # Return most-used language
-        return max(languages, key=languages.get)
+        return _repo_language(owner, repo) or "Python"
     except Exception:
         return "Python"
 
@@ -247,46 +631,75 @@ def get_default_branch(owner: Optional[str] = None, repo: Optional[str] = None)
 
 # ==== GraphQL Project Operations ====
 
-def get_issue_node_id(owner: str, repo: str, issue_number: int) -> str:
-    """Get GraphQL node ID for issue"""
-    data = graphql_request("""
-        query($owner: String!, $repo: String!, $number: Int!) {
-            repository(owner: $owner, name: $repo) {
-                issue(number: $number) { id }
+def _minify_gql(query: str) -> str:
+    # Le query non contengono stringhe letterali: collassare gli spazi è sicuro (meno byte a ogni POST)
+    return " ".join(query.split())
+
+_Q_ISSUE_NODE_ID = _minify_gql("""
+    query($owner: String!, $repo: String!, $number: Int!) {
+        repository(owner: $owner, name: $repo) {
+            issue(number: $number) { id }
+        }
+    }
+""")
+
+_M_ADD_PROJECT_ITEM = _minify_gql("""
+    mutation($projectId: ID!, $contentId: ID!) {
+        addProjectV2ItemById(input: {projectId: $projectId, contentId: $contentId}) {
+            item { id }
+        }
+    }
+""")
+
+_M_SET_SINGLE_SELECT = _minify_gql("""
+    mutation($projectId: ID!, $itemId: ID!, $fieldId: ID!, $optionId: String!) {
+        updateProjectV2ItemFieldValue(
+            input: {
+                projectId: $projectId,
+                itemId: $itemId,
+                fieldId: $fieldId,
+                value: { singleSelectOptionId: $optionId }
             }
+        ) {
+            projectV2Item { id }
         }
-    """, {"owner": owner, "repo": repo, "number": issue_number})
+    }
+""")
+
+def get_issue_node_id(owner: str, repo: str, issue_number: int) -> str:
+    """Get GraphQL node ID for issue"""
+    data = graphql_request(_Q_ISSUE_NODE_ID, {"owner": owner, "repo": repo, "number": issue_number})
     
     return data["repository"]["issue"]["id"]
 
+async def aget_issue_node_id(owner: str, repo: str, issue_number: int) -> str:
+    """Async variant of get_issue_node_id"""
+    data = await agraphql_request(_Q_ISSUE_NODE_ID, {"owner": owner, "repo": repo, "number": issue_number})
+    return data["repository"]["issue"]["id"]
+
 def add_item_to_project(project_id: str, content_node_id: str) -> str:
     """Add item to ProjectV2 and return item ID"""
-    data = graphql_request("""
-        mutation($projectId: ID!, $contentId: ID!) {
-            addProjectV2ItemById(input: {projectId: $projectId, contentId: $contentId}) {
-                item { id }
-            }
-        }
-    """, {"projectId": project_id, "contentId": content_node_id})
+    data = graphql_request(_M_ADD_PROJECT_ITEM, {"projectId": project_id, "contentId": content_node_id})
     
     return data["addProjectV2ItemById"]["item"]["id"]
 
+async def aadd_item_to_project(project_id: str, content_node_id: str) -> str:
+    """Async variant of add_item_to_project"""
+    data = await agraphql_request(_M_ADD_PROJECT_ITEM, {"projectId": project_id, "contentId": content_node_id})
+    return data["addProjectV2ItemById"]["item"]["id"]
+
 def set_project_single_select(project_id: str, item_id: str, field_id: str, option_id: str) -> None:
     """Set ProjectV2 SingleSelect field (e.g., Status)"""
-    graphql_request("""
-        mutation($projectId: ID!, $itemId: ID!, $fieldId: ID!, $optionId: String!) {
-            updateProjectV2ItemFieldValue(
-                input: {
-                    projectId: $projectId,
-                    itemId: $itemId,
-                    fieldId: $fieldId,
-                    value: { singleSelectOptionId: $optionId }
-                }
-            ) {
-                projectV2Item { id }
-            }
-        }
-    """, {
+    graphql_request(_M_SET_SINGLE_SELECT, {
+        "projectId": project_id,
+        "itemId": item_id,
+        "fieldId": field_id,
+        "optionId": option_id
+    })
+
+async def aset_project_single_select(project_id: str, item_id: str, field_id: str, option_id: str) -> None:
+    """Async variant of set_project_single_select"""
+    await agraphql_request(_M_SET_SINGLE_SELECT, {
         "projectId": project_id,
         "itemId": item_id,
         "fieldId": field_id,
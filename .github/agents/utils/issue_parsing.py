@@ -5,9 +5,40 @@ Issue and project parsing utilities
 import re
 from typing import Optional, Dict, List
 
+_RE_SLUG = re.compile(r"[^a-z0-9]+")
+
+# All resolve_project_tag forms in one alternation (single scan of the body);
+# each branch has its own named group, listed below in priority order.
+_PROJECT_TAG_RE = re.compile(
+    r"^\s*project\s*:\s*(?P<project>[A-Za-z0-9._\-\s]{1,40})\s*$"
+    r"|^\s*project-tag\s*:\s*(?P<project_tag>[A-Za-z0-9._\-\s]{1,40})\s*$"
+    r"|#project\((?P<hashtag>[A-Za-z0-9._\-\s]{1,40})\)"
+    r"|\[project:(?P<bracket>[A-Za-z0-9._\-\s]{1,40})\]"
+    r"|^\s*tag\s*:\s*(?P<tag>[A-Za-z0-9._\-\s]{1,30})\s*$",
+    re.I | re.M,
+)
+_PROJECT_TAG_PRIORITY = ("project", "project_tag", "hashtag", "bracket", "tag")
+
+# extract_requirements_from_issue
+_ACC_PATTERNS = tuple(re.compile(p, re.DOTALL) for p in (
+    r"(?i)\*\*acceptance[^*]*\*\*:?\s*(.*?)(?=\n\*\*|\n#|\n---|\Z)",
+    r"(?i)##?\s*acceptance[^#\n]*\n(.*?)(?=\n#|\n---|\Z)",
+    r"(?i)acceptance\s*criteria[:\s]*(.*?)(?=\n\*\*|\n#|\n---|\Z)"
+))
+_RE_BULLET = re.compile(r'[-*+]\s*(.+)')
+_FILE_PATTERNS = tuple(re.compile(p) for p in (
+    r'`([^`]+\.[a-zA-Z]{1,4})`',  # Files in backticks
+    r'(?:file|path):\s*([^\s\n]+\.[a-zA-Z]{1,4})',  # file: path.ext
+))
+_DEP_PATTERNS = tuple(re.compile(p) for p in (
+    r"(?i)depends?\s+on[:\s]*(.+?)(?=\n|$)",
+    r"(?i)requires?[:\s]*(.+?)(?=\n|$)",
+    r"(?i)blocked\s+by[:\s]*(.+?)(?=\n|$)"
+))
+
 def slugify(text: str) -> str:
     text = text.lower()
-    text = re.sub(r"[^a-z0-9]+","-", text).strip("-")
+    text = _RE_SLUG.sub("-", text).strip("-")
     return text[:60]
 
 def resolve_project_tag(text: str) -> Optional[str]:
@@ -23,25 +54,18 @@ def resolve_project_tag(text: str) -> Optional[str]:
     if not text or not isinstance(text, str):
         return None
     
-    # Priority patterns (most specific first)
-    patterns = [
-        r"(?i)^\s*project\s*:\s*([A-Za-z0-9._\-\s]{1,40})\s*$",
-        r"(?i)^\s*project-tag\s*:\s*([A-Za-z0-9._\-\s]{1,40})\s*$", 
-        r"(?i)#project\(([A-Za-z0-9._\-\s]{1,40})\)",
-        r"(?i)\[project:([A-Za-z0-9._\-\s]{1,40})\]",
-        r"(?i)^\s*tag\s*:\s*([A-Za-z0-9._\-\s]{1,30})\s*$",
-    ]
+    # First match of each form, collected in a single pass
+    first: Dict[str, str] = {}
+    for m in _PROJECT_TAG_RE.finditer(text):
+        first.setdefault(m.lastgroup, m.group(m.lastgroup))
     
-    for pattern in patterns:
-        matches = re.findall(pattern, text, flags=re.M)
-        if matches:
-            # Take the first match
-            raw = matches[0].strip()
-            if raw:
-                slugified = slugify(raw)
-                # Ensure it's not too short or generic
-                if len(slugified) >= 2 and slugified not in ["tag", "project", "issue"]:
-                    return slugified
+    for group in _PROJECT_TAG_PRIORITY:
+        raw = first.get(group, "").strip()
+        if raw:
+            slugified = slugify(raw)
+            # Ensure it's not too short or generic
+            if len(slugified) >= 2 and slugified not in ["tag", "project", "issue"]:
+                return slugified
     
     return None
 
@@ -50,66 +74,48 @@ def extract_requirements_from_issue(text: str) -> Dict[str, List[str]]:
     if not text:
         return {"requirements": [], "acceptance": [], "files": [], "dependencies": []}
     
-    result = {
-        "requirements": [],
-        "acceptance": [], 
-        "files": [],
-        "dependencies": []
+    # dict come insieme ordinato: dedup in C mantenendo l'ordine di apparizione
+    result: Dict[str, Dict[str, None]] = {
+        "requirements": {},
+        "acceptance": {},
+        "files": {},
+        "dependencies": {}
     }
     
     # Extract acceptance criteria
-    acc_patterns = [
-        r"(?i)\*\*acceptance[^*]*\*\*:?\s*(.*?)(?=\n\*\*|\n#|\n---|\Z)",
-        r"(?i)##?\s*acceptance[^#\n]*\n(.*?)(?=\n#|\n---|\Z)",
-        r"(?i)acceptance\s*criteria[:\s]*(.*?)(?=\n\*\*|\n#|\n---|\Z)"
-    ]
-    
-    for pattern in acc_patterns:
-        match = re.search(pattern, text, re.DOTALL)
+    for pattern in _ACC_PATTERNS:
+        match = pattern.search(text)
         if match:
             acc_text = match.group(1).strip()
             # Extract bullet points
-            bullets = re.findall(r'[-*+]\s*(.+)', acc_text)
-            result["acceptance"].extend(bullets)
+            result["acceptance"].update(dict.fromkeys(_stripped(_RE_BULLET.findall(acc_text))))
             break
     
     # Extract file paths
-    file_patterns = [
-        r'`([^`]+\.[a-zA-Z]{1,4})`',  # Files in backticks
-        r'(?:file|path):\s*([^\s\n]+\.[a-zA-Z]{1,4})',  # file: path.ext
-    ]
-    
-    for pattern in file_patterns:
-        matches = re.findall(pattern, text)
-        result["files"].extend(matches)
+    for pattern in _FILE_PATTERNS:
+        result["files"].update(dict.fromkeys(_stripped(pattern.findall(text))))
     
     # Extract dependencies
-    dep_patterns = [
-        r"(?i)depends?\s+on[:\s]*(.+?)(?=\n|$)",
-        r"(?i)requires?[:\s]*(.+?)(?=\n|$)",
-        r"(?i)blocked\s+by[:\s]*(.+?)(?=\n|$)"
-    ]
-    
-    for pattern in dep_patterns:
-        matches = re.findall(pattern, text)
-        result["dependencies"].extend(matches)
+    for pattern in _DEP_PATTERNS:
+        result["dependencies"].update(dict.fromkeys(_stripped(pattern.findall(text))))
     
-    # Clean up and deduplicate
-    for key in result:
-        result[key] = list(set(item.strip() for item in result[key] if item.strip()))
-    
-    return result
+    return {key: list(items) for key, items in result.items()}
+
+def _stripped(matches: List[str]):
+    return (s for s in map(str.strip, matches) if s)
 
 def format_issue_summary(issue_data: Dict) -> str:
     """Format issue data into a readable summary"""
     title = issue_data.get("title", "")
-    body = issue_data.get("body", "")
+    body = issue_data.get("body") or ""
+    
+    summary_parts = [f"**Title**: {title}"]
+    if not body.strip():
+        return summary_parts[0]  # Title-only issue: nothing to parse
     
     requirements = extract_requirements_from_issue(body)
     project_tag = resolve_project_tag(body)
     
-    summary_parts = [f"**Title**: {title}"]
-    
     if project_tag:
         summary_parts.append(f"**Project**: {project_tag}")
     
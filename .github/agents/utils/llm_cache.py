@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+LLM response cache: exact match (sha256 of model|max_tokens|prompt) plus an
+opt-in semantic layer (MiniLM embeddings + FAISS) for near-duplicate prompts
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import diskcache
+except ImportError:  # fallback: un file per chiave sotto LLM_CACHE_DIR
+    diskcache = None
+
+# Configuration constants
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no", "off")
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "/tmp/llm_cache"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_SIZE_LIMIT = 2 ** 30
+NOCACHE_MARKER = "# NOCACHE"
+
+# Layer semantico: opt-in (un prompt "simile" può chiedere una patch diversa)
+LLM_SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes", "on")
+LLM_SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.92"))
+LLM_SEMANTIC_MODEL = os.getenv("LLM_SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+LLM_SEMANTIC_DIR = Path(os.getenv("LLM_SEMANTIC_CACHE_DIR", "/tmp/llm_sem_cache"))
+
+# Le risposte d'errore dei provider sono stringhe: non vanno mai messe in cache
+_ERROR_PREFIXES = ("OpenAI API error:", "Anthropic API error:", "Gemini API error:", "LLM API error:")
+
+_stats = {"hits": 0, "misses": 0, "semantic_hits": 0}
+_stats_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+_semantic: Any = None  # None = non inizializzato, False = non disponibile
+
+def cache_key(prompt: str, model: str, max_tokens: int) -> str:
+    return hashlib.sha256(f"{model}|{max_tokens}|{prompt}".encode("utf-8")).hexdigest()
+
+def is_cacheable(prompt: str) -> bool:
+    return LLM_CACHE_ENABLED and NOCACHE_MARKER not in prompt
+
+class _FileCache:
+    """Minimal diskcache-like store: one file per key, TTL from mtime."""
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > LLM_CACHE_TTL:
+                return None
+            return path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def delete(self, key: str) -> bool:
+        try:
+            self._path(key).unlink()
+            return True
+        except OSError:
+            return False
+
+    def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(value, encoding="utf-8")
+        os.replace(tmp, path)
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if diskcache is not None:
+                    _cache = diskcache.Cache(str(LLM_CACHE_DIR), size_limit=LLM_CACHE_SIZE_LIMIT)
+                else:
+                    _cache = _FileCache(LLM_CACHE_DIR)
+    return _cache
+
+def _count(field: str) -> None:
+    with _stats_lock:
+        _stats[field] += 1
+
+def get_cached(key: str) -> Optional[str]:
+    try:
+        value = _get_cache().get(key)
+    except Exception:
+        value = None  # cache best-effort: mai bloccare la chiamata LLM
+    _count("hits" if value is not None else "misses")
+    return value
+
+def store(key: str, response: str) -> None:
+    # Solo risposte testuali valide: un handler che restituisce altro non deve far fallire la chiamata
+    if not isinstance(response, str) or not response or response.startswith(_ERROR_PREFIXES):
+        return
+    try:
+        _get_cache().set(key, response, expire=LLM_CACHE_TTL)
+    except Exception as e:
+        print(f"⚠️ LLM cache write failed: {e}")
+
+class _SemanticIndex:
+    """FAISS inner-product index over normalized prompt embeddings + JSON metadata."""
+    def __init__(self, root: Path):
+        import faiss
+        from sentence_transformers import SentenceTransformer
+        self._faiss = faiss
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.model = SentenceTransformer(LLM_SEMANTIC_MODEL)
+        dim = self.model.get_sentence_embedding_dimension()
+        self.lock = threading.Lock()
+        index_path, meta_path = self.root / "index.faiss", self.root / "meta.json"
+        self.meta: List[Dict[str, Any]] = []
+        if index_path.exists() and meta_path.exists():
+            self.index = faiss.read_index(str(index_path))
+            self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if not self.meta or self.index.ntotal != len(self.meta) or self.index.d != dim:
+            self.index, self.meta = faiss.IndexFlatIP(dim), []
+
+    def _embed(self, prompt: str):
+        return self.model.encode([prompt], normalize_embeddings=True).astype("float32")
+
+    def lookup(self, prompt: str, model: str, max_tokens: int) -> Optional[str]:
+        vec = self._embed(prompt)
+        with self.lock:
+            if self.index.ntotal == 0:
+                return None
+            scores, ids = self.index.search(vec, min(4, self.index.ntotal))
+            for score, i in zip(scores[0], ids[0], strict=True):
+                if score < LLM_SEMANTIC_THRESHOLD:
+                    break
+                entry = self.meta[i]
+                if entry["model"] == model and entry["max_tokens"] == max_tokens and entry["response"]:
+                    return entry["response"]
+        return None
+
+    def forget(self, prompt: str, model: str, max_tokens: int) -> None:
+        """Tombstone every entry lookup() could return for this prompt (FAISS flat index has no delete)"""
+        vec = self._embed(prompt)
+        with self.lock:
+            if self.index.ntotal == 0:
+                return
+            scores, ids = self.index.search(vec, min(4, self.index.ntotal))
+            changed = False
+            for score, i in zip(scores[0], ids[0], strict=True):
+                if score < LLM_SEMANTIC_THRESHOLD:
+                    break
+                entry = self.meta[i]
+                if entry["model"] == model and entry["max_tokens"] == max_tokens and entry["response"]:
+                    entry["response"] = None
+                    changed = True
+            if changed:
+                self._persist()
+
+    def add(self, prompt: str, model: str, max_tokens: int, response: str) -> None:
+        vec = self._embed(prompt)
+        with self.lock:
+            self.index.add(vec)
+            self.meta.append({"model": model, "max_tokens": max_tokens, "response": response})
+            self._persist()
+
+    def _persist(self) -> None:
+        tmp_index = self.root / f".index.{os.getpid()}.tmp"
+        tmp_meta = self.root / f".meta.{os.getpid()}.tmp"
+        self._faiss.write_index(self.index, str(tmp_index))
+        tmp_meta.write_text(json.dumps(self.meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_index, self.root / "index.faiss")
+        os.replace(tmp_meta, self.root / "meta.json")
+
+def _get_semantic() -> Optional[_SemanticIndex]:
+    global _semantic
+    if not LLM_SEMANTIC_CACHE:
+        return None
+    if _semantic is None:
+        with _cache_lock:
+            if _semantic is None:
+                try:
+                    _semantic = _SemanticIndex(LLM_SEMANTIC_DIR)
+                except Exception as e:  # faiss / sentence-transformers assenti
+                    print(f"⚠️ Semantic LLM cache disabled: {e}")
+                    _semantic = False
+    return _semantic or None
+
+def lookup(prompt: str, model: str, max_tokens: int) -> Optional[str]:
+    """Exact match first, then (if enabled) nearest semantic neighbour"""
+    if not is_cacheable(prompt):
+        return None
+    value = get_cached(cache_key(prompt, model, max_tokens))
+    if value is None:
+        sem = _get_semantic()
+        if sem is not None:
+            try:
+                value = sem.lookup(prompt, model, max_tokens)
+            except Exception:
+                value = None
+            if value is not None:
+                _count("semantic_hits")
+    return value
+
+def remember(prompt: str, model: str, max_tokens: int, response: str) -> None:
+    if not isinstance(response, str) or not response or response.startswith(_ERROR_PREFIXES) or not is_cacheable(prompt):
+        return
+    store(cache_key(prompt, model, max_tokens), response)
+    sem = _get_semantic()
+    if sem is not None:
+        try:
+            sem.add(prompt, model, max_tokens, response)
+        except Exception as e:
+            print(f"⚠️ Semantic LLM cache write failed: {e}")
+
+def forget(prompt: str, model: str, max_tokens: int) -> None:
+    """Drop a cached response (e.g. one the caller could not parse) so the next call reaches the provider"""
+    if not is_cacheable(prompt):
+        return
+    try:
+        _get_cache().delete(cache_key(prompt, model, max_tokens))
+    except Exception as e:
+        print(f"⚠️ LLM cache delete failed: {e}")
+    sem = _get_semantic()
+    if sem is not None:
+        try:
+            sem.forget(prompt, model, max_tokens)
+        except Exception as e:
+            print(f"⚠️ Semantic LLM cache delete failed: {e}")
+
+def get_cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
@@ -3,72 +3,545 @@
 LLM provider routing and API calls
 """
 import os
+import sys
+import json
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from . import llm_cache
 
 # Configuration constants
 TIMEOUT_LLM = 120
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_BATCH_TIMEOUT = int(os.getenv("LLM_BATCH_TIMEOUT", str(24 * 3600)))  # completion window dei batch
+LLM_BATCH_POLL_MAX = 60
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_MAX_DELAY = 30.0
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+_GEMINI_REQUEST_OPTIONS = {"timeout": TIMEOUT_LLM}
 
-def call_llm_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000) -> str:
-    """Call LLM API with timeout and retry logic"""
-    if model.startswith(("claude", "anthropic")):
-        return call_anthropic_api(prompt, model, max_tokens)
-    if model.startswith("gemini"):
-        return call_gemini_api(prompt, model, max_tokens)
-    return call_openai_api(prompt, model, max_tokens)
+def _lazy_import(name: str):
+    """Register `name` as a lazy module: the real import runs on first attribute access. None if not installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or spec.loader is None:
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# SDK dei provider: import pesanti (pydantic, httpx, ...) rimandati al primo uso
+openai = _lazy_import("openai")
+anthropic = _lazy_import("anthropic")
+genai = _lazy_import("google.generativeai")
+
+def _require(module, package: str):
+    if module is None:
+        raise RuntimeError(f"{package} package not installed")
+    return module
+
+# Client sync riusati per api_key: un solo pool HTTP per processo invece di uno per chiamata.
+# max_retries=0 ovunque: i retry li fa _with_retries, niente doppio backoff SDK + nostro
+_clients: Dict[Tuple[str, str], object] = {}
+_clients_lock = threading.Lock()
+
+def _shared_client(provider: str, api_key: str, factory):
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+def _openai_client(api_key: str):
+    sdk = _require(openai, "openai")
+    def factory():
+        import httpx
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        return sdk.OpenAI(api_key=api_key, timeout=TIMEOUT_LLM, max_retries=0,
+                          http_client=httpx.Client(http2=http2, timeout=TIMEOUT_LLM))
+    return _shared_client("openai", api_key, factory)
+
+# genai.configure è globale al processo: si riapplica quando la chiave cambia, non solo al cache miss
+_gemini_api_key: Optional[str] = None
+
+def _gemini_model(api_key: str, model: str, system_prefix: str):
+    global _gemini_api_key
+    sdk = _require(genai, "google-generativeai")
+    if api_key != _gemini_api_key:
+        sdk.configure(api_key=api_key)
+        _gemini_api_key = api_key
+    return _gemini_model_for(model, system_prefix)
+
+@lru_cache(maxsize=16)
+def _gemini_model_for(model: str, system_prefix: str):
+    # Il GenerativeModel non tiene la chiave: usa la configurazione globale corrente
+    return _require(genai, "google-generativeai").GenerativeModel(model, system_instruction=system_prefix or None)
+
+def _anthropic_client(api_key: str):
+    sdk = _require(anthropic, "anthropic")
+    return _shared_client("anthropic", api_key, lambda: sdk.Anthropic(api_key=api_key, max_retries=0))
+
+# I client async sono legati all'event loop che apre le connessioni: uno per (loop, provider, api_key)
+_async_clients: Dict[Tuple[int, str, str], object] = {}
+
+def _async_client(provider: str, api_key: str, factory):
+    key = (id(asyncio.get_running_loop()), provider, api_key)
+    client = _async_clients.get(key)
+    if client is None:
+        client = _async_clients[key] = factory()
+    return client
+
+async def _aclose_async_clients() -> None:
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _async_clients if k[0] == loop_id]:
+        try:
+            await _async_clients.pop(key).close()
+        except Exception:
+            pass
+
+# ==== Retry su errori transitori (429/5xx/timeout); auth e request errate falliscono subito ====
+
+_TRANSIENT_STATUS = frozenset((408, 409, 429, 500, 502, 503, 504, 529))
+_TRANSIENT_ERRORS = frozenset((
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",  # openai / anthropic
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",  # google
+    "TimeoutException", "NetworkError", "TimeoutError", "ConnectionError",  # httpx / builtin
+))
+
+def _is_transient(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status in _TRANSIENT_STATUS:
+        return True
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+def _retry_delay(attempt: int) -> float:
+    # Exponential backoff con full jitter: 1, 2, 4, ... s (max LLM_RETRY_MAX_DELAY)
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, 2.0 ** attempt))
+
+# ==== Circuit breaker per provider: dopo N chiamate fallite di fila (retry esauriti) si smette di provare per un cooldown ====
+
+# provider -> (fallimenti consecutivi, monotonic dell'ultimo fallimento)
+_BREAKERS: Dict[str, Tuple[int, float]] = {}
+
+def _breaker_check(provider: str) -> None:
+    failures, last_fail = _BREAKERS.get(provider, (0, 0.0))
+    if failures >= LLM_BREAKER_THRESHOLD and time.monotonic() - last_fail < LLM_BREAKER_COOLDOWN:
+        raise RuntimeError(f"{provider} circuit open after {failures} consecutive failures")
+
+def _breaker_record(provider: str, exc: BaseException = None) -> None:
+    if exc is None:
+        _BREAKERS.pop(provider, None)
+    elif _is_transient(exc):
+        # Solo errori transitori: auth/request errate non dicono nulla sulla salute del provider
+        failures = _BREAKERS.get(provider, (0, 0.0))[0]
+        _BREAKERS[provider] = (failures + 1, time.monotonic())
+
+def _with_retries(call, provider: str = None):
+    if provider:
+        _breaker_check(provider)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            result = call()
+            if provider:
+                _breaker_record(provider)
+            return result
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not _is_transient(e):
+                if provider:
+                    _breaker_record(provider, e)
+                raise
+            delay = _retry_delay(attempt)
+            print(f"⚠️ Transient LLM error ({type(e).__name__}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
 
-def call_openai_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000) -> str:
+async def _awith_retries(call, provider: str = None):
+    if provider:
+        _breaker_check(provider)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            result = await call()
+            if provider:
+                _breaker_record(provider)
+            return result
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not _is_transient(e):
+                if provider:
+                    _breaker_record(provider, e)
+                raise
+            delay = _retry_delay(attempt)
+            print(f"⚠️ Transient LLM error ({type(e).__name__}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+def _cache_text(prompt: str, system_prefix: str) -> str:
+    # Il prefisso statico fa parte della chiave di cache
+    return f"{system_prefix}\x00{prompt}" if system_prefix else prompt
+
+def call_llm_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "",
+                 refresh: bool = False) -> str:
+    """
+    Call LLM API with timeout and retry logic (exact-match cached, see llm_cache).
+    refresh=True skips the cache lookup and overwrites the entry: use it when retrying
+    after a reply that could not be parsed, otherwise the retry gets the same reply back.
+    """
+    cache_text = _cache_text(prompt, system_prefix)
+    if not refresh:
+        cached = llm_cache.lookup(cache_text, model, max_tokens)
+        if cached is not None:
+            return cached
+    handler = next((fn for prefix, fn in _PROVIDER_PREFIXES if model.startswith(prefix)), call_openai_api)
+    response = handler(prompt, model, max_tokens, system_prefix)
+    llm_cache.remember(cache_text, model, max_tokens, response)
+    return response
+
+def forget_llm_response(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "") -> None:
+    """Evict the cached reply for these call_llm_api arguments (call it when the reply failed to parse)"""
+    llm_cache.forget(_cache_text(prompt, system_prefix), model, max_tokens)
+
+# Prompt caching nativo: il prefisso statico va per primo e viene marcato dove il provider lo supporta
+def _openai_messages(prompt: str, system_prefix: str) -> list:
+    # OpenAI applica da solo la cache sui prefissi identici (>= 1024 token): basta che stia in testa
+    messages = [{"role": "system", "content": system_prefix}] if system_prefix else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def _anthropic_system(system_prefix: str) -> dict:
+    if not system_prefix:
+        return {}
+    return {"system": [{"type": "text", "text": system_prefix, "cache_control": {"type": "ephemeral"}}]}
+
+def call_openai_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "") -> str:
     try:
-        from openai import OpenAI
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not configured")
         
-        client = OpenAI(api_key=api_key, timeout=TIMEOUT_LLM)
-        resp = client.chat.completions.create(
+        client = _openai_client(api_key)
+        resp = _with_retries(lambda: client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=_openai_messages(prompt, system_prefix),
             temperature=0.1,
             max_tokens=max_tokens,
-        )
+        ), "openai")
         return resp.choices[0].message.content or ""
     except Exception as e:
         return f"OpenAI API error: {str(e)[:200]}"
 
-def call_anthropic_api(prompt: str, model: str = "claude-3-5-sonnet-latest", max_tokens: int = 4000) -> str:
+def call_anthropic_api(prompt: str, model: str = "claude-3-5-sonnet-latest", max_tokens: int = 4000, system_prefix: str = "") -> str:
     try:
-        import anthropic
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
-            return RuntimeError("OPENAI_API_KEY not configured")
+            raise RuntimeError("ANTHROPIC_API_KEY not configured")
         
-        client = anthropic.Anthropic(api_key=api_key)  # Remove timeout from constructor
-        resp = client.messages.create(
+        client = _anthropic_client(api_key)  # Remove timeout from constructor
+        resp = _with_retries(lambda: client.messages.create(
             model=model,
             max_tokens=max_tokens,
             temperature=0.1,
             messages=[{"role": "user", "content": prompt}],
-            timeout=TIMEOUT_LLM  # Pass timeout to the call
-        )
+            timeout=TIMEOUT_LLM,  # Pass timeout to the call
+            **_anthropic_system(system_prefix)
+        ), "anthropic")
         return "".join(getattr(b, "text", str(b)) for b in resp.content)
     except Exception as e:
         return f"Anthropic API error: {str(e)[:200]}"
 
-def call_gemini_api(prompt: str, model: str = "gemini-1.5-pro", max_tokens: int = 4000) -> str:
+def call_gemini_api(prompt: str, model: str = "gemini-1.5-pro", max_tokens: int = 4000, system_prefix: str = "") -> str:
     try:
-        import google.generativeai as genai
         api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY not configured")
+        
+        m = _gemini_model(api_key, model, system_prefix)
+        resp = _with_retries(lambda: m.generate_content(prompt, request_options=_GEMINI_REQUEST_OPTIONS), "gemini")
+        return resp.text
+    except Exception as e:
+        return f"Gemini API error: {str(e)[:200]}"
+
+# Routing prefisso modello -> provider (default: OpenAI)
+_PROVIDER_PREFIXES = (
+    ("claude", call_anthropic_api),
+    ("anthropic", call_anthropic_api),
+    ("gemini", call_gemini_api),
+)
+
+# ==== Async variants (prompt indipendenti in parallelo) ====
+
+async def acall_llm_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "",
+                        refresh: bool = False) -> str:
+    """Async counterpart of call_llm_api (same routing, cache, refresh flag and error-string convention)"""
+    cache_text = _cache_text(prompt, system_prefix)
+    if not refresh:
+        cached = llm_cache.lookup(cache_text, model, max_tokens)
+        if cached is not None:
+            return cached
+    handler = next((fn for prefix, fn in _ASYNC_PROVIDER_PREFIXES if model.startswith(prefix)), acall_openai_api)
+    response = await handler(prompt, model, max_tokens, system_prefix)
+    llm_cache.remember(cache_text, model, max_tokens, response)
+    return response
+
+async def acall_openai_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "") -> str:
+    try:
+        api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not configured")
         
-        genai.configure(api_key=api_key)
-        m = genai.GenerativeModel(model)
-        resp = m.generate_content(prompt)
+        sdk = _require(openai, "openai")
+        client = _async_client("openai", api_key, lambda: sdk.AsyncOpenAI(api_key=api_key, timeout=TIMEOUT_LLM, max_retries=0))
+        resp = await _awith_retries(lambda: client.chat.completions.create(
+            model=model,
+            messages=_openai_messages(prompt, system_prefix),
+            temperature=0.1,
+            max_tokens=max_tokens,
+        ), "openai")
+        return resp.choices[0].message.content or ""
+    except Exception as e:
+        return f"OpenAI API error: {str(e)[:200]}"
+
+async def acall_anthropic_api(prompt: str, model: str = "claude-3-5-sonnet-latest", max_tokens: int = 4000, system_prefix: str = "") -> str:
+    try:
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise RuntimeError("ANTHROPIC_API_KEY not configured")
+        
+        sdk = _require(anthropic, "anthropic")
+        client = _async_client("anthropic", api_key, lambda: sdk.AsyncAnthropic(api_key=api_key, max_retries=0))
+        resp = await _awith_retries(lambda: client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=0.1,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=TIMEOUT_LLM,
+            **_anthropic_system(system_prefix)
+        ), "anthropic")
+        return "".join(getattr(b, "text", str(b)) for b in resp.content)
+    except Exception as e:
+        return f"Anthropic API error: {str(e)[:200]}"
+
+async def acall_gemini_api(prompt: str, model: str = "gemini-1.5-pro", max_tokens: int = 4000, system_prefix: str = "") -> str:
+    try:
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY not configured")
+        
+        m = _gemini_model(api_key, model, system_prefix)
+        resp = await _awith_retries(lambda: m.generate_content_async(prompt, request_options=_GEMINI_REQUEST_OPTIONS), "gemini")
         return resp.text
     except Exception as e:
         return f"Gemini API error: {str(e)[:200]}"
 
+_ASYNC_PROVIDER_PREFIXES = (
+    ("claude", acall_anthropic_api),
+    ("anthropic", acall_anthropic_api),
+    ("gemini", acall_gemini_api),
+)
+
+async def acall_many(requests: List[Tuple[str, str]], max_tokens: int = 4000,
+                     concurrency: int = LLM_MAX_CONCURRENCY, system_prefix: str = "") -> List[str]:
+    """
+    Run (prompt, model) pairs concurrently, at most `concurrency` in flight.
+    Results keep input order; failures come back as error strings like the single-call API.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    
+    async def one(prompt: str, model: str) -> str:
+        async with sem:
+            return await acall_llm_api(prompt, model, max_tokens, system_prefix)
+    
+    results = await asyncio.gather(*(one(p, m) for p, m in requests), return_exceptions=True)
+    return [r if isinstance(r, str) else f"LLM API error: {str(r)[:200]}" for r in results]
+
+def call_llm_many(requests: List[Tuple[str, str]], max_tokens: int = 4000,
+                  concurrency: int = LLM_MAX_CONCURRENCY, system_prefix: str = "") -> List[str]:
+    """Sync entry point for acall_many (not usable from inside a running event loop)"""
+    async def _runner() -> List[str]:
+        try:
+            return await acall_many(requests, max_tokens, concurrency, system_prefix)
+        finally:
+            await _aclose_async_clients()
+    
+    return asyncio.run(_runner())
+
+# ==== Batch APIs (bulk asincrono lato provider, ~50% di costo) ====
+
+def _poll_batch(retrieve, is_done, what: str):
+    """Poll retrieve() with exponential backoff until is_done(batch) or LLM_BATCH_TIMEOUT"""
+    deadline = time.monotonic() + LLM_BATCH_TIMEOUT
+    delay = 2.0
+    while True:
+        batch = _with_retries(retrieve)
+        if is_done(batch):
+            return batch
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"{what} batch not finished after {LLM_BATCH_TIMEOUT}s")
+        time.sleep(delay)
+        delay = min(delay * 2, LLM_BATCH_POLL_MAX)
+
+def call_openai_batch(prompts: List[str], model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "") -> List[str]:
+    """Submit prompts through /v1/batches; results keep input order, failures are error strings"""
+    try:
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not configured")
+        
+        client = _openai_client(api_key)
+        lines = (json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": _openai_messages(prompt, system_prefix),
+                "temperature": 0.1,
+                "max_tokens": max_tokens,
+            },
+        }) for i, prompt in enumerate(prompts))
+        upload = client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+        print(f"📦 OpenAI batch {batch.id} submitted ({len(prompts)} prompts)")
+        batch = _poll_batch(lambda: client.batches.retrieve(batch.id),
+                            lambda b: b.status in ("completed", "failed", "expired", "cancelled"), "OpenAI")
+        if batch.status != "completed" and not batch.output_file_id:
+            raise RuntimeError(f"batch {batch.id} {batch.status}")
+        
+        results = [f"OpenAI API error: no result for request {i}" for i in range(len(prompts))]
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                body = (item.get("response") or {}).get("body") or {}
+                if item.get("error") or "choices" not in body:
+                    err = item.get("error") or body.get("error")
+                    results[int(item["custom_id"])] = f"OpenAI API error: {str(err)[:200]}"
+                else:
+                    results[int(item["custom_id"])] = body["choices"][0]["message"]["content"] or ""
+        return results
+    except Exception as e:
+        return [f"OpenAI API error: {str(e)[:200]}"] * len(prompts)
+
+def call_anthropic_batch(prompts: List[str], model: str = "claude-3-5-sonnet-latest", max_tokens: int = 4000, system_prefix: str = "") -> List[str]:
+    """Submit prompts through the Message Batches API; results keep input order"""
+    try:
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise RuntimeError("ANTHROPIC_API_KEY not configured")
+        
+        client = _anthropic_client(api_key)
+        batch = client.messages.batches.create(requests=[{
+            "custom_id": str(i),
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": 0.1,
+                "messages": [{"role": "user", "content": prompt}],
+                **_anthropic_system(system_prefix),
+            },
+        } for i, prompt in enumerate(prompts)])
+        print(f"📦 Anthropic batch {batch.id} submitted ({len(prompts)} prompts)")
+        _poll_batch(lambda: client.messages.batches.retrieve(batch.id),
+                    lambda b: b.processing_status == "ended", "Anthropic")
+        
+        results = [f"Anthropic API error: no result for request {i}" for i in range(len(prompts))]
+        for entry in client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                text = "".join(getattr(b, "text", str(b)) for b in entry.result.message.content)
+            else:
+                text = f"Anthropic API error: {entry.result.type} {str(getattr(entry.result, 'error', ''))[:200]}"
+            results[int(entry.custom_id)] = text
+        return results
+    except Exception as e:
+        return [f"Anthropic API error: {str(e)[:200]}"] * len(prompts)
+
+# Row-marshaling: più prompt brevi in una sola chat completion (1 slot RPM invece di N)
+LLM_MARSHAL_MAX_ITEMS = 20
+_MARSHAL_SYSTEM = (
+    "You will receive several independent tasks, each introduced by a line <<<TASK i>>>. "
+    "Answer each task separately. Return a JSON object {\"answers\": [...]} whose list holds "
+    "one string answer per task, in task order."
+)
+
+def call_openai_batched(prompts: List[str], model: str = "gpt-4o-mini", per_item_tokens: int = 800) -> List[str]:
+    """
+    Answer many short prompts with one request per chunk of LLM_MARSHAL_MAX_ITEMS.
+    A chunk whose reply cannot be mapped back 1:1 falls back to individual call_openai_api calls.
+    """
+    results: List[str] = []
+    for start in range(0, len(prompts), LLM_MARSHAL_MAX_ITEMS):
+        chunk = prompts[start:start + LLM_MARSHAL_MAX_ITEMS]
+        answers = None
+        try:
+            api_key = os.environ.get("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("OPENAI_API_KEY not configured")
+            
+            content = "\n\n".join(f"<<<TASK {i}>>>\n{p}" for i, p in enumerate(chunk))
+            client = _openai_client(api_key)
+            # Valori del giro corrente legati come default: la lambda non dipende dalle variabili del loop
+            resp = _with_retries(lambda client=client, content=content, chunk=chunk: client.chat.completions.create(
+                model=model,
+                messages=_openai_messages(content, _MARSHAL_SYSTEM),
+                temperature=0.1,
+                max_tokens=per_item_tokens * len(chunk),
+                response_format={"type": "json_object"},
+            ), "openai")
+            answers = json.loads(resp.choices[0].message.content or "{}").get("answers")
+        except Exception as e:
+            print(f"⚠️ Marshaled OpenAI call failed: {str(e)[:200]}")
+        
+        if isinstance(answers, list) and len(answers) == len(chunk):
+            results.extend(a if isinstance(a, str) else json.dumps(a) for a in answers)
+        else:
+            print(f"⚠️ Marshaled reply does not match {len(chunk)} tasks, falling back to single calls")
+            results.extend(call_openai_api(p, model, per_item_tokens) for p in chunk)
+    return results
+
+_BATCH_PROVIDER_PREFIXES = (
+    ("claude", call_anthropic_batch),
+    ("anthropic", call_anthropic_batch),
+)
+
+def call_llm_batch(prompts: List[str], model: str = "gpt-4o-mini", max_tokens: int = 4000, system_prefix: str = "") -> List[str]:
+    """
+    Bulk variant of call_llm_api via the provider Batch API (blocks until the batch ends).
+    Cached prompts are served locally, only misses are submitted. Gemini falls back to call_llm_many.
+    """
+    if model.startswith("gemini"):
+        return call_llm_many([(p, model) for p in prompts], max_tokens, system_prefix=system_prefix)
+    
+    cache_texts = [_cache_text(p, system_prefix) for p in prompts]
+    results: List[str] = [llm_cache.lookup(t, model, max_tokens) for t in cache_texts]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        handler = next((fn for prefix, fn in _BATCH_PROVIDER_PREFIXES if model.startswith(prefix)), call_openai_batch)
+        for i, response in zip(missing, handler([prompts[i] for i in missing], model, max_tokens, system_prefix), strict=True):
+            results[i] = response
+            llm_cache.remember(cache_texts[i], model, max_tokens, response)
+    return results
+
+_ROLE_MODEL_ENV = {
+    "reviewer": "REVIEWER_MODEL",
+    "developer": "DEVELOPER_MODEL",
+    "analyzer": "ANALYZER_MODEL",
+}
+
 def get_preferred_model(role: str) -> str:
-    return {
-        "reviewer": os.environ.get("REVIEWER_MODEL", "gpt-4o-mini"),
-        "developer": os.environ.get("DEVELOPER_MODEL", "gpt-4o-mini"),
-        "analyzer": os.environ.get("ANALYZER_MODEL", "gpt-4o-mini"),
-    }.get(role, "gpt-4o-mini")
+    env_name = _ROLE_MODEL_ENV.get(role)
+    return os.environ.get(env_name, "gpt-4o-mini") if env_name else "gpt-4o-mini"
@@ -5,22 +5,29 @@ Basato sullo schema di ContextBuilder → FileRewriter → Validator+Applier
 """
 import json
 import hashlib
+import heapq
 import tempfile
 import subprocess
 import os
 import shutil
 import ast
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
 
+try:
+    import orjson
+except ImportError:  # fallback stdlib
+    orjson = None
+
 # Import improvements for production
 try:
-    from utils.llm_providers import call_llm_api
+    from utils.llm_providers import call_llm_api, forget_llm_response
 except ImportError:
     try:
-        from llm_providers import call_llm_api
+        from llm_providers import call_llm_api, forget_llm_response
     except ImportError:
         # Production should fail early with clear error
         raise ImportError(
@@ -32,6 +39,26 @@ def sha256_bytes(b: bytes) -> str:
     """Calculate SHA256 hash for content verification"""
     return "sha256:" + hashlib.sha256(b).hexdigest()
 
+def _json_loads(raw: str):
+    # orjson.JSONDecodeError eredita da json.JSONDecodeError: gli except esistenti restano validi
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def read_source(path: Path) -> Tuple[str, str]:
+    """Read a file once: (text with universal newlines like read_text, hash of the bytes on disk)"""
+    raw = path.read_bytes()
+    text = raw.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, sha256_bytes(raw)
+
+# La root del repo non cambia durante un run: un solo `git rev-parse` per cwd (i fallimenti non vengono memorizzati)
+@lru_cache(maxsize=8)
+def _git_repo_root(cwd: str) -> Path:
+    return Path(subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        capture_output=True, text=True, check=True, cwd=cwd
+    ).stdout.strip())
+
 @dataclass
 class RefaceContract:
     """Contract between LLM and validator"""
@@ -47,35 +74,66 @@ class KEEPBlockValidator:
     
     KEEP_OPEN_PATTERN = re.compile(r"# >>> KEEP:(?P<id>[A-Za-z0-9_\-]+)")
     KEEP_CLOSE_PATTERN = re.compile(r"# <<< KEEP:(?P<id>[A-Za-z0-9_\-]+)")
+    KEEP_OPEN_MARKER = "# >>> KEEP:"
+    KEEP_CLOSE_MARKER = "# <<< KEEP:"
     
     @classmethod
     def extract_keep_blocks(cls, content: str) -> Dict[str, str]:
-        """Extract KEEP blocks from content"""
-        blocks = {}
-        lines = content.split('\n')
-        current_block_id = None
-        current_block_lines = []
-        
-        for line in lines:
+        """Extract KEEP blocks from content (literal marker search, no per-line loop)"""
+        # Quasi tutti i file non hanno blocchi KEEP: una ricerca letterale evita regex e hashing della stringa
+        if cls.KEEP_OPEN_MARKER not in content:
+            return {}
+        return dict(cls._scan_keep_blocks(content))
+    
+    # build, freeze e le due validate ripassano gli stessi contenuti: la scansione si fa una volta per stringa
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _scan_keep_blocks(content: str) -> Tuple[Tuple[str, str], ...]:
+        # str.find salta direttamente alle righe con un marker (memchr/memmem in C); ogni riga trovata
+        # segue le regole del vecchio ciclo riga per riga: un'apertura (ri)avvia il blocco anche dentro
+        # un altro blocco e ha la precedenza su una chiusura nella stessa riga; chiude solo il primo
+        # marker di chiusura della riga, se ha lo stesso id; un blocco non chiuso è ignorato.
+        cls = KEEPBlockValidator
+        blocks: Dict[str, str] = {}
+        current_id: Optional[str] = None
+        block_start = 0
+        next_open = content.find(cls.KEEP_OPEN_MARKER)
+        next_close = content.find(cls.KEEP_CLOSE_MARKER)
+        while next_open >= 0 or (current_id is not None and next_close >= 0):
+            # Fuori da un blocco contano solo le aperture
+            if current_id is None or next_close < 0:
+                at = next_open
+            elif next_open < 0:
+                at = next_close
+            else:
+                at = min(next_open, next_close)
+            line_start = content.rfind('\n', 0, at) + 1
+            line_end = content.find('\n', at)
+            if line_end < 0:
+                line_end = len(content)
+            line = content[line_start:line_end]
             open_match = cls.KEEP_OPEN_PATTERN.search(line)
             if open_match:
-                current_block_id = open_match.group('id')
-                current_block_lines = [line]
-                continue
-            
-            if current_block_id:
-                current_block_lines.append(line)
+                current_id = open_match.group('id')
+                block_start = line_start
+            elif current_id is not None:
                 close_match = cls.KEEP_CLOSE_PATTERN.search(line)
-                if close_match and close_match.group('id') == current_block_id:
-                    blocks[current_block_id] = '\n'.join(current_block_lines)
-                    current_block_id = None
-                    current_block_lines = []
-        
-        return blocks
+                if close_match and close_match.group('id') == current_id:
+                    blocks[current_id] = content[block_start:line_end]
+                    current_id = None
+            pos = line_end + 1
+            if 0 <= next_open < pos:
+                next_open = content.find(cls.KEEP_OPEN_MARKER, pos)
+            if 0 <= next_close < pos:
+                next_close = content.find(cls.KEEP_CLOSE_MARKER, pos)
+        return tuple(blocks.items())
     
     @classmethod
     def validate_keep_blocks_preserved(cls, original: str, new_content: str) -> None:
         """Validate that KEEP blocks are preserved"""
+        # Nessun blocco da preservare, o contenuto identico: niente da verificare
+        if cls.KEEP_OPEN_MARKER not in original or new_content == original:
+            return
         original_blocks = cls.extract_keep_blocks(original)
         new_blocks = cls.extract_keep_blocks(new_content)
         
@@ -85,6 +143,18 @@ class KEEPBlockValidator:
             if new_blocks[block_id] != original_block:
                 raise RuntimeError(f"KEEP_BLOCK_MODIFIED: Block '{block_id}' was modified")
 
+# Estensione -> tag del code fence nel prompt
+_LANGUAGE_TAGS = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.cpp': 'cpp',
+    '.c': 'c'
+}
+
 # Enhanced context builder with KEEP blocks support
 class ContextBuilder:
     """Builds intelligent, structured context for LLM"""
@@ -99,9 +169,7 @@ class ContextBuilder:
         """Build optimized context for full file rewrite"""
         
         # Load current file and calculate hash
-        src_path = Path(file_path)
-        src_content = src_path.read_text(encoding="utf-8")
-        base_hash = sha256_bytes(src_content.encode("utf-8"))
+        src_content, base_hash = read_source(Path(file_path))
         
         # Filter and consolidate reviews
         top_reviews = self._pick_top_reviews(reviews, self.max_reviews)
@@ -121,13 +189,16 @@ The file contains {len(keep_blocks)} KEEP blocks that must be preserved EXACTLY:
 NEVER modify content between # >>> KEEP:id and # <<< KEEP:id markers.
 """
         
-        context = f"""# TASK: Complete File Rewrite
+        # Il sorgente resta un pezzo a sé: il budget si controlla sulle lunghezze, senza
+        # materializzare il prompt completo quando poi verrebbe scartato per la compressione
+        head = f"""# TASK: Complete File Rewrite
 
 ## FILE: {file_path}
 
 ## CURRENT STATE (AUTHORITATIVE)
 ```{self._get_language_tag(file_path)}
-{src_content}
+"""
+        tail = f"""
 ```
 
 ## BASE HASH (CRITICAL)
@@ -173,10 +244,10 @@ Your output will be:
 Generate the JSON response now:"""
 
         # Check token budget (simplified check)
-        if self._estimate_tokens(context) > self.max_tokens:
-            context = self._compress_context(context, file_path, consolidated_reviews)
+        if self._estimate_tokens(head, src_content, tail) > self.max_tokens:
+            return self._compress_context(file_path, src_content, base_hash, consolidated_reviews)
         
-        return context
+        return "".join((head, src_content, tail))
     
     def _pick_top_reviews(self, reviews: List[str], limit: int) -> List[str]:
         """Select most relevant reviews by recency and specificity"""
@@ -185,18 +256,17 @@ Generate the JSON response now:"""
         
         # Simple heuristic: take the most recent reviews
         # In production, add relevance scoring here
-        scored_reviews = []
-        for i, review in enumerate(reviews[-10:]):  # Last 10 reviews max
+        def score(item) -> float:
+            i, review = item
             # Score by recency (more recent = higher score)
             recency_score = (10 - i) / 10
             # Score by length/specificity (longer = more specific)
             specificity_score = min(len(review) / 500, 1.0)
-            total_score = (recency_score * 0.7) + (specificity_score * 0.3)
-            scored_reviews.append((review, total_score))
+            return (recency_score * 0.7) + (specificity_score * 0.3)
         
-        # Sort by score and take top N
-        scored_reviews.sort(key=lambda x: x[1], reverse=True)
-        return [review for review, _ in scored_reviews[:limit]]
+        # Top N by score without sorting everything (same tie order as a stable reverse sort)
+        top = heapq.nlargest(limit, enumerate(reviews[-10:]), key=score)  # Last 10 reviews max
+        return [review for _, review in top]
     
     def _consolidate_reviews(self, reviews: List[str]) -> str:
         """Consolidate multiple reviews into clear instructions"""
@@ -224,29 +294,15 @@ Generate the JSON response now:"""
     
     def _get_language_tag(self, file_path: str) -> str:
         """Get language tag for syntax highlighting"""
-        ext_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.java': 'java',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.cpp': 'cpp',
-            '.c': 'c'
-        }
-        ext = Path(file_path).suffix.lower()
-        return ext_map.get(ext, 'text')
+        return _LANGUAGE_TAGS.get(Path(file_path).suffix.lower(), 'text')
     
-    def _estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (4 chars ≈ 1 token)"""
-        return len(text) // 4
+    def _estimate_tokens(self, *texts: str) -> int:
+        """Rough token estimation (4 chars ≈ 1 token), summed over texts without joining them"""
+        return sum(map(len, texts)) // 4
     
-    def _compress_context(self, context: str, file_path: str, reviews: str) -> str:
+    def _compress_context(self, file_path: str, src_content: str, base_hash: str, reviews: str) -> str:
         """Compress context if too large"""
-        # Simple compression - truncate reviews
-        src_content = Path(file_path).read_text(encoding="utf-8")
-        base_hash = sha256_bytes(src_content.encode("utf-8"))
-        
+        # Simple compression - truncate reviews (file già letto e hashato da build)
         compressed_reviews = reviews[:1000] + "...(truncated)" if len(reviews) > 1000 else reviews
         
         return f"""# TASK: Complete File Rewrite
@@ -259,29 +315,6 @@ Generate the JSON response now:"""
 ## FEEDBACK: {compressed_reviews}
 ## OUTPUT: JSON with file_path, pre_hash="{base_hash}", new_content, changelog"""
 
-    # --- KEEP blocks helpers (qui, perché usate da ValidatorApplier) ---
-    def _freeze_keep_blocks(self, content: str):
-        """Sostituisce i blocchi KEEP con placeholder univoci per evitare che il formatter li tocchi."""
-        blocks = KEEPBlockValidator.extract_keep_blocks(content)
-        if not blocks:
-            return content, None
-        frozen = content
-        mapping = {}
-        for i, (bid, block) in enumerate(blocks.items(), 1):
-            token = f"__KEEP_BLOCK_{i}_{bid}__"
-            frozen = frozen.replace(block, token)
-            mapping[token] = block
-        return frozen, mapping
-
-    def _thaw_keep_blocks(self, content: str, mapping: Dict[str, str]) -> str:
-        """Ripristina i blocchi KEEP originali dopo il formatting."""
-        if not mapping:
-            return content
-        thawed = content
-        for token, block in mapping.items():
-            thawed = thawed.replace(token, block)
-        return thawed
-
 class FileRewriter:
     """LLM-based full file rewriter"""
     
@@ -307,7 +340,7 @@ CRITICAL: Your response must be ONLY valid JSON. No explanations, no markdown, j
             
             # Clean and parse JSON
             cleaned_response = self._clean_json_response(raw_response)
-            contract_data = json.loads(cleaned_response)
+            contract_data = _json_loads(cleaned_response)
             self._validate_contract_types(contract_data)
             
             # Validate contract structure
@@ -318,22 +351,27 @@ CRITICAL: Your response must be ONLY valid JSON. No explanations, no markdown, j
             return RefaceContract(**contract_data)
             
         except json.JSONDecodeError:
+            # La risposta non parsabile non deve restare in cache per i run successivi
+            forget_llm_response(json_prompt, self.model, self.max_tokens)
             # One retry with stricter instruction
             print("⚠️  JSON parse failed, retrying with stricter prompt...")
+            strict_prompt = context + "\n\nReturn ONLY raw JSON object. No markdown, no explanations."
             try:
                 raw_response = call_llm_api(
-                    context + "\n\nReturn ONLY raw JSON object. No markdown, no explanations.",
+                    strict_prompt,
                     model=self.model, 
                     max_tokens=self.max_tokens
                 )
                 cleaned_response = self._clean_json_response(raw_response)
-                contract_data = json.loads(cleaned_response)
+                contract_data = _json_loads(cleaned_response)
                 self._validate_contract_types(contract_data)
                 return RefaceContract(**contract_data)
             except json.JSONDecodeError as e:
+                forget_llm_response(strict_prompt, self.model, self.max_tokens)
                 raise ValueError(f"LLM returned invalid JSON after retry: {e}")
                 
         except Exception as e:
+            forget_llm_response(json_prompt, self.model, self.max_tokens)
             raise RuntimeError(f"File rewrite generation failed: {e}")
     
     def _clean_json_response(self, raw_response: str) -> str:
@@ -401,27 +439,17 @@ class ValidatorApplier:
         
         # 0.b Repo root enforcement (hardening)
         try:
-            repo_root = Path(subprocess.run(
-                ["git", "rev-parse", "--show-toplevel"], 
-                capture_output=True, text=True, check=True
-            ).stdout.strip())
-            file_path.relative_to(repo_root)
+            file_path.relative_to(_git_repo_root(os.getcwd()))
         except (subprocess.CalledProcessError, ValueError):
             raise RuntimeError(f"UNSAFE_PATH: {file_path} not under repo or not a git repo")
         
-        # 0.c Size gate (1MB limit for text files)
-        if len(contract.new_content.encode('utf-8')) > 1_000_000:
+        # 0.c Size gate (1MB limit for text files); i byte codificati si riusano per la scrittura
+        payload = contract.new_content.encode('utf-8')
+        if len(payload) > 1_000_000:
             raise RuntimeError("OVERSIZE_OUTPUT: new_content exceeds 1MB limit")
         
-        # 1. Pre-image verification
-        if not self._verify_pre_hash(file_path, contract.pre_hash):
-            raise RuntimeError(
-                f"BASE_CHANGED: File {file_path} was modified since context was built. "
-                f"Expected hash {contract.pre_hash}, but file has changed."
-            )
-        
-        # Store original content for KEEP block validation
-        original_content = file_path.read_text(encoding='utf-8')
+        # 1. Pre-image verification (one read: the same bytes give hash and original content)
+        original_content = self._verify_and_get_original(file_path, contract.pre_hash)
         
         # 2. KEEP blocks validation (if enabled)
         if self.enable_keep_blocks:
@@ -432,36 +460,64 @@ class ValidatorApplier:
         
         # 4. Auto-formatting (optional) — freeze KEEP blocks to avoid formatter changes inside them
         formatted_content = contract.new_content
+        keep_blocks_intact = True
         if self.enable_auto_format:
             frozen, map_back = self._freeze_keep_blocks(formatted_content) if self.enable_keep_blocks else (formatted_content, None)
             formatted = self._auto_format(file_path, frozen)
             formatted_content = self._thaw_keep_blocks(formatted, map_back) if map_back else formatted
+            # Se ogni placeholder è sopravvissuto al formatter il thaw ha rimesso i blocchi byte per byte
+            keep_blocks_intact = not map_back or all(token in formatted for token in map_back)
  
-        # 5. Atomic file replacement
-        self._atomic_write(file_path, formatted_content)
-        
-        # 6. Smoke tests (if available)
-        # 6. KEEP blocks validation (post-format) to ensure exact preservation
-        if self.enable_keep_blocks:
+        # 5. KEEP blocks validation (post-format), only if the formatter may have dropped a frozen block;
+        # done before writing so a failure leaves the file untouched
+        if self.enable_keep_blocks and not keep_blocks_intact:
             KEEPBlockValidator.validate_keep_blocks_preserved(original_content, formatted_content)
+        
+        # 6. Atomic file replacement (re-encode only if the formatter changed something)
+        unchanged = formatted_content == contract.new_content
+        if not unchanged:
+            payload = formatted_content.encode('utf-8')
+        self._atomic_write(file_path, payload)
 
         # 7. Smoke tests (if available)
-        self._run_smoke_tests(file_path)
+        self._run_smoke_tests(file_path, formatted_content, syntax_verified=unchanged)
         
         # 7. Git operations (only if changes exist)
         self._git_commit_if_changed(file_path, contract.changelog)
         
         return True
     
-    def _verify_pre_hash(self, file_path: Path, expected_hash: str) -> bool:
-        """Verify that file hasn't changed since context was built"""
+    # --- KEEP blocks helpers: una sola re.sub per freeze e per thaw invece di un replace per blocco ---
+    def _freeze_keep_blocks(self, content: str):
+        """Sostituisce i blocchi KEEP con placeholder univoci per evitare che il formatter li tocchi."""
+        blocks = KEEPBlockValidator.extract_keep_blocks(content)
+        if not blocks:
+            return content, None
+        mapping = {f"__KEEP_BLOCK_{i}_{bid}__": block for i, (bid, block) in enumerate(blocks.items(), 1)}
+        tokens = {block: token for token, block in mapping.items()}
+        pattern = re.compile("|".join(map(re.escape, tokens)))
+        return pattern.sub(lambda m: tokens[m.group(0)], content), mapping
+
+    def _thaw_keep_blocks(self, content: str, mapping: Dict[str, str]) -> str:
+        """Ripristina i blocchi KEEP originali dopo il formatting."""
+        if not mapping:
+            return content
+        pattern = re.compile("|".join(map(re.escape, mapping)))
+        return pattern.sub(lambda m: mapping[m.group(0)], content)
+    
+    def _verify_and_get_original(self, file_path: Path, expected_hash: str) -> str:
+        """Verify that file hasn't changed since context was built and return its content"""
         try:
-            current_content = file_path.read_bytes()
-            current_hash = sha256_bytes(current_content)
-            return current_hash == expected_hash
+            original_content, current_hash = read_source(file_path)
         except FileNotFoundError:
             # File deletion should be handled explicitly, not through refacing
-            return False
+            current_hash = None
+        if current_hash != expected_hash:
+            raise RuntimeError(
+                f"BASE_CHANGED: File {file_path} was modified since context was built. "
+                f"Expected hash {expected_hash}, but file has changed."
+            )
+        return original_content
     
     def _validate_syntax(self, file_path: Path, content: str) -> None:
         """Validate syntax using language-specific tools"""
@@ -541,32 +597,22 @@ class ValidatorApplier:
     
     def _format_python(self, content: str) -> str:
         """Format Python code using black and ruff"""
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, 
-                                       encoding='utf-8', newline='\n') as tmp:
-            tmp.write(content)
-            tmp.flush()
-            tmp_path = tmp.name
-        
-        try:
-            # Apply ruff fixes
-            if self._command_exists('ruff'):
-                subprocess.run(['ruff', 'check', '--fix', tmp_path], 
-                             capture_output=True, check=False)
-            
-            # Apply black formatting
-            if self._command_exists('black'):
-                subprocess.run(['black', tmp_path], 
-                             capture_output=True, check=False)
-            
-            # Read formatted content
-            with open(tmp_path, 'r', encoding='utf-8', newline='\n') as f:
-                return f.read()
-        
-        finally:
-            os.unlink(tmp_path)
-        
-        return content  # Return original if formatting fails
+        # Pipe stdin -> stdout come per prettier: niente file temporaneo da scrivere e rileggere
+        # Apply ruff fixes (exit 1 = violazioni residue, stdout contiene comunque il codice corretto)
+        if self._command_exists('ruff'):
+            result = subprocess.run(['ruff', 'check', '--fix', '--stdin-filename', 'temp.py', '-'],
+                                    input=content, text=True, capture_output=True)
+            if result.returncode in (0, 1) and result.stdout:
+                content = result.stdout
+        
+        # Apply black formatting
+        if self._command_exists('black'):
+            result = subprocess.run(['black', '-q', '-'],
+                                    input=content, text=True, capture_output=True)
+            if result.returncode == 0 and result.stdout:
+                content = result.stdout
+        
+        return content  # Original (or partially formatted) if a formatter fails
     
     def _format_javascript(self, content: str, file_path: Path) -> str:
         """Format JavaScript/TypeScript using prettier"""
@@ -590,16 +636,17 @@ class ValidatorApplier:
         
         return content
     
-    def _atomic_write(self, file_path: Path, content: str) -> None:
-        """Write file atomically to prevent corruption and collisions"""
+    def _atomic_write(self, file_path: Path, data: bytes) -> None:
+        """Write already-encoded content atomically to prevent corruption and collisions"""
         
         # Use NamedTemporaryFile in same directory for true atomicity
         dirp = file_path.parent
-        if not content.endswith("\n"):
-            content = content + "\n"
-        with tempfile.NamedTemporaryFile('w', delete=False, dir=dirp, encoding='utf-8', newline='\n') as tmp:
+        # Scrittura binaria: niente TextIOWrapper né copia per aggiungere il newline finale
+        with tempfile.NamedTemporaryFile('wb', delete=False, dir=dirp) as tmp:
             
-            tmp.write(content)
+            tmp.write(data)
+            if not data.endswith(b"\n"):
+                tmp.write(b"\n")
             tmp.flush()
             os.fsync(tmp.fileno())  # Force write to disk
             tmp_name = tmp.name
@@ -607,17 +654,17 @@ class ValidatorApplier:
         # Atomic rename
         os.replace(tmp_name, file_path)
     
-    def _run_smoke_tests(self, file_path: Path) -> None:
+    def _run_smoke_tests(self, file_path: Path, content: str, syntax_verified: bool = False) -> None:
         """Run basic smoke tests if available"""
         
         # This is optional and should be safe (no side effects)
         ext = file_path.suffix.lower()
         
-        if ext == '.py':
-            # Use AST parsing instead of import (no execution)
+        # Se il formatter non ha cambiato nulla il contenuto è già passato da _validate_syntax
+        if ext == '.py' and not syntax_verified:
+            # Use AST parsing instead of import (no execution), on the content just written
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    ast.parse(f.read(), filename=str(file_path))
+                ast.parse(content, filename=str(file_path))
                 # If we reach here, syntax is valid
             except SyntaxError as e:
                 print(f"Warning: Smoke test failed for {file_path}: {e}")
@@ -628,15 +675,17 @@ class ValidatorApplier:
         """Commit changes to git only if there are actual changes"""
         
         try:
-            # Add file to git
-            subprocess.run(['git', 'add', str(file_path)], check=True)
-            
-            # Check if there are any changes staged
-            no_changes = subprocess.run([
-                'git', 'diff', '--cached', '--quiet', '--', str(file_path)
-            ]).returncode == 0
+            path = str(file_path)
+            # Tracked file: worktree vs HEAD decides, `commit --only` then stages it (2 git runs instead of 3)
+            changed = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', path]).returncode == 1
+            if not changed:
+                # Untracked file (or no HEAD yet): diff can't see it, check through the index
+                subprocess.run(['git', 'add', path], check=True)
+                changed = subprocess.run([
+                    'git', 'diff', '--cached', '--quiet', '--', path
+                ]).returncode != 0
             
-            if no_changes:
+            if not changed:
                 print(f"No changes detected in {file_path}, skipping commit")
                 return
             
@@ -648,15 +697,17 @@ class ValidatorApplier:
             commit_message = f"reface: {file_path.name} - {changelog_summary}"
             
             # Commit
-            subprocess.run(['git', 'commit', '-m', commit_message], check=True)
+            subprocess.run(['git', 'commit', '--only', '-m', commit_message, '--', path], check=True)
             print(f"Committed changes to {file_path}")
             
         except subprocess.CalledProcessError as e:
             print(f"Warning: Git commit failed: {e}")
             # Don't fail the entire operation for git issues
     
-    def _command_exists(self, command: str) -> bool:
-        """Check if a command exists in PATH (cross-platform)"""
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _command_exists(command: str) -> bool:
+        """Check if a command exists in PATH (cross-platform; PATH lookup cached per process)"""
         return shutil.which(command) is not None
 
 # Main orchestrator class
@@ -756,20 +807,35 @@ def integrate_with_pr_fix_mode():
     
     return success
 
+@lru_cache(maxsize=8)
+def _shared_refacer(model: str = "gpt-4o-mini") -> FullFileRefacer:
+    # Il refacer contiene solo configurazione (nessuno stato per file): un'istanza per modello basta
+    return FullFileRefacer(model=model)
+
 # Feature flag integration
 class EnhancedPRFixMode:
     """Enhanced PR fix mode with full refacing strategy"""
     
+    # Strategy from the environment, read once at class definition
+    _FULL_STRATEGY = os.getenv("REFACE_STRATEGY") == "full"
+    
     def __init__(self, use_refacing: bool = None):
-        # Check environment variable for strategy
-        self.use_refacing = use_refacing or os.getenv("REFACE_STRATEGY") == "full"
+        # None = decide from REFACE_STRATEGY; an explicit bool wins
+        self.use_refacing = self._FULL_STRATEGY if use_refacing is None else use_refacing
+        self._refacer: Optional[FullFileRefacer] = None
         
         if self.use_refacing:
-            self.refacer = FullFileRefacer()
             print("🔄 Using FULL REFACING strategy")
         else:
             print("📝 Using traditional diff strategy")
     
+    @property
+    def refacer(self) -> "FullFileRefacer":
+        # Risolto al primo process_pr_fix e condiviso tra le istanze
+        if self._refacer is None:
+            self._refacer = _shared_refacer()
+        return self._refacer
+    
     def process_pr_fix(self, pr_number: int, file_path: str, 
                       requirements: str, review_history: List[str]) -> bool:
         """Process PR fix using selected strategy"""
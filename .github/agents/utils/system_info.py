@@ -6,41 +6,117 @@ import os
 import sys
 import subprocess
 import shutil
-from typing import Dict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
-def validate_environment() -> Dict[str, bool]:
-    """Validate required environment setup"""
+# Info di debug: rev-parse risponde in millisecondi, se non basta non vale la pena attendere
+GIT_PROBE_TIMEOUT = 2
+
+_PY_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+@lru_cache(maxsize=16)
+def _which(name: str, path: Optional[str]) -> Optional[str]:
+    # PATH fa parte della chiave: se cambia, la ricerca si ripete
+    return shutil.which(name, path=path)
+
+# Variabili da cui dipende validate_environment: chiave della memoizzazione
+_WATCHED_ENV = ("GITHUB_TOKEN", "GITHUB_REPOSITORY", "PATH", "OPENAI_API_KEY",
+                "ANTHROPIC_API_KEY", "GEMINI_API_KEY", "GH_CLASSIC_TOKEN")
+
+def validate_environment() -> Mapping[str, bool]:
+    """Validate required environment setup (read-only view, shared between calls)"""
+    # Chiave dai valori correnti di os.environ: una variabile cambiata dà un nuovo calcolo
+    return _validate_cached(tuple(os.environ.get(k) for k in _WATCHED_ENV))
+
+@lru_cache(maxsize=16)
+def _validate_cached(values: tuple) -> Mapping[str, bool]:
+    env = dict(zip(_WATCHED_ENV, values, strict=True))
     checks = {
-        "github_token": bool(os.environ.get("GITHUB_TOKEN")),
-        "github_repo": bool(os.environ.get("GITHUB_REPOSITORY")),
-        "git_available": bool(shutil.which("git")),
-        "patch_available": bool(shutil.which("patch")),
+        "github_token": bool(env.get("GITHUB_TOKEN")),
+        "github_repo": bool(env.get("GITHUB_REPOSITORY")),
+        "git_available": bool(_which("git", env.get("PATH"))),
+        "patch_available": bool(_which("patch", env.get("PATH"))),
         "llm_key_available": bool(
-            os.environ.get("OPENAI_API_KEY") or 
-            os.environ.get("ANTHROPIC_API_KEY") or 
-            os.environ.get("GEMINI_API_KEY")
+            env.get("OPENAI_API_KEY") or 
+            env.get("ANTHROPIC_API_KEY") or 
+            env.get("GEMINI_API_KEY")
         ),
-        "classic_token": bool(os.environ.get("GH_CLASSIC_TOKEN")),
+        "classic_token": bool(env.get("GH_CLASSIC_TOKEN")),
     }
     
-    return checks
+    # Vista immutabile: la cache si può condividere senza copie difensive
+    return MappingProxyType(checks)
+
+# Variabili Actions riportate da get_system_info (chiave = nome in minuscolo)
+_GH_INFO_KEYS = ("GITHUB_REPOSITORY", "GITHUB_REF", "GITHUB_EVENT_NAME")
 
 def get_system_info() -> Dict[str, str]:
     """Get system information for debugging"""
     info = {
-        "python_version": f"{sys.version_info.major}.{sys.version_info.minor}",
+        "python_version": _PY_VERSION,
         "working_directory": os.getcwd(),
-        "github_repository": os.environ.get("GITHUB_REPOSITORY", "not set"),
-        "github_ref": os.environ.get("GITHUB_REF", "not set"),
-        "github_event_name": os.environ.get("GITHUB_EVENT_NAME", "not set"),
     }
+    env = os.environ  # letto a ogni chiamata: il workflow può esportare variabili a runtime
+    info.update({key.lower(): env.get(key, "not set") for key in _GH_INFO_KEYS})
     
-    try:
-        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], 
-                               capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            info["git_commit"] = result.stdout.strip()
-    except Exception:
-        info["git_commit"] = "unavailable"
+    from .llm_cache import get_cache_stats
+    stats = get_cache_stats()
+    info["llm_cache_hits"] = str(stats["hits"])
+    info["llm_cache_misses"] = str(stats["misses"])
+    info["llm_cache_semantic_hits"] = str(stats["semantic_hits"])
+    
+    # .git letto direttamente; poi il SHA fornito da Actions; il fork di git solo come ultima risorsa
+    sha = _read_git_head() or env.get("GITHUB_SHA")
+    if sha:
+        info["git_commit"] = sha[:7]
+    elif not _which("git", env.get("PATH")):
+        info["git_commit"] = "unavailable"  # niente git: inutile tentare il fork
+    else:
+        try:
+            result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], 
+                                   capture_output=True, text=True, timeout=GIT_PROBE_TIMEOUT)
+            info["git_commit"] = result.stdout.strip() if result.returncode == 0 else "unavailable"
+        except Exception:
+            info["git_commit"] = "unavailable"
     
     return info
+
+def _read_git_head(git_dir: str = ".git") -> Optional[str]:
+    """
+    Resolve HEAD by reading .git directly (no fork/exec). Not cached: the dev agent
+    commits during a run. Follows a ".git" pointer file (submodules, worktrees) and
+    the worktree's commondir for refs. Returns None for anything unusual (detached
+    oddities, missing refs) so the caller falls back to git rev-parse.
+    """
+    try:
+        if os.path.isfile(git_dir):
+            with open(git_dir, "r", encoding="utf-8") as f:
+                pointer = f.read().strip()
+            if not pointer.startswith("gitdir: "):
+                return None
+            git_dir = os.path.join(os.path.dirname(git_dir), pointer[8:])
+        refs_dir = git_dir
+        commondir = os.path.join(git_dir, "commondir")
+        if os.path.isfile(commondir):
+            with open(commondir, "r", encoding="utf-8") as f:
+                refs_dir = os.path.join(git_dir, f.read().strip())
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+        if not head.startswith("ref: "):
+            return head if len(head) == 40 else None
+        ref = head[5:]
+        for base in dict.fromkeys((git_dir, refs_dir)):
+            ref_path = os.path.join(base, *ref.split("/"))
+            if os.path.isfile(ref_path):
+                with open(ref_path, "r", encoding="utf-8") as f:
+                    sha = f.read().strip()
+                return sha if len(sha) == 40 else None
+        with open(os.path.join(refs_dir, "packed-refs"), "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref and len(parts[0]) == 40:
+                    return parts[0]
+    except OSError:
+        pass
+    return None